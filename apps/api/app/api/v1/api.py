@@ -1,5 +1,6 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, items, events, schedules, feedback, upload, admin, notifications
+from app.core.config import settings
+from app.api.v1.endpoints import auth, users, items, events, schedules, feedback, upload, admin, notifications, calendar, storage
 
 api_router = APIRouter()
 
@@ -12,4 +13,7 @@ api_router.include_router(schedules.router, prefix="/schedules", tags=["schedule
 api_router.include_router(feedback.router, prefix="/feedback", tags=["feedback"])
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
+api_router.include_router(calendar.router, prefix="/calendar", tags=["calendar"])
 
+if settings.STORAGE_BACKEND == "local":
+    api_router.include_router(storage.router, prefix="/storage", tags=["storage"])
@@ -3,20 +3,24 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from datetime import datetime, timedelta
+from uuid import UUID
+from app.db import session as db_session
 from app.db.session import get_db
+from app.db.routing import get_read_db, replica_monitor
+from app.db.pool_metrics import pool_status
+from app.jobs.attendance import reconcile_attendee_counts
 from app.models.user import User, Profile
 from app.models.item import Item, ItemClaim
 from app.models.event import Event
 from app.models.feedback import Feedback
-from app.core.security import get_current_user
+from app.core.security import Principal, user_cache, bump_token_version, invalidate_user
+from app.core.permissions import require_admin
+from app.core.pagination import paginate, next_cursor
+from app.core.images import variant_url
+from app.api.v1.endpoints.events import tag_facet_cache
 
 router = APIRouter()
 
-def require_admin(current_user: User = Depends(get_current_user)):
-    if current_user.role != "admin":
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return current_user
-
 class UserUpdate(BaseModel):
     role: str | None = None
     verified: str | None = None  # Changed to string to avoid bool parsing issues
@@ -31,11 +35,12 @@ def list_users(
     search: str | None = Query(None),
     skip: int = 0,
     limit: int = 50,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
-    """List all users with optional filters"""
-    query = db.query(User).join(Profile, User.id == Profile.user_id)
+    """List all users with optional filters, newest first"""
+    query = db.query(User, Profile).join(Profile, User.id == Profile.user_id)
     
     if role:
         query = query.filter(User.role == role)
@@ -47,11 +52,13 @@ def list_users(
         )
     
     total = query.count()
-    users = query.offset(skip).limit(limit).all()
+    rows, cursor = next_cursor(paginate(
+        query, [User.created_at, User.id], (datetime, UUID), limit,
+        cursor=cursor, offset=skip, descending=True
+    ).all(), limit, lambda row: (row[0].created_at, row[0].id))
     
     result = []
-    for user in users:
-        profile = db.query(Profile).filter(Profile.user_id == user.id).first()
+    for user, profile in rows:
         result.append({
             "id": str(user.id),
             "email": user.email,
@@ -64,14 +71,15 @@ def list_users(
     
     return {
         "total": total,
-        "users": result
+        "users": result,
+        "next_cursor": cursor
     }
 
 @router.get("/users/{user_id}")
 def get_user_detail(
     user_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Get detailed user information"""
     user = db.query(User).filter(User.id == user_id).first()
@@ -96,7 +104,7 @@ def get_user_detail(
             "roll_no": profile.roll_no if profile else None,
             "phone": profile.phone if profile else None,
             "hostel": profile.hostel if profile else None,
-            "avatar_url": profile.avatar_url if profile else None
+            "avatar_url": variant_url(profile.avatar_url, "thumb") if profile else None
         },
         "activity": {
             "items_posted": items_posted,
@@ -110,13 +118,15 @@ def update_user(
     user_id: str,
     request: UserUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Update user role or verification status"""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    previous_claims = (user.role, user.verified)
+    
     if request.role:
         if request.role not in ["student", "faculty", "admin"]:
             raise HTTPException(status_code=400, detail="Invalid role")
@@ -125,8 +135,13 @@ def update_user(
     if request.verified is not None:
         user.verified = request.verified.lower() == "true"
     
+    # Tokens carrying the old role/verified claims must stop authorizing
+    if (user.role, user.verified) != previous_claims:
+        bump_token_version(db, user.id)
+    
     db.commit()
     db.refresh(user)
+    invalidate_user(str(user.id))
     
     return {
         "id": str(user.id),
@@ -141,7 +156,7 @@ def list_flagged_items(
     skip: int = 0,
     limit: int = 50,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """List items that might need moderation (e.g., very old active items)"""
     # Items active for more than 30 days
@@ -176,7 +191,7 @@ def list_flagged_items(
 def delete_item_admin(
     item_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Delete an item (admin moderation)"""
     item = db.query(Item).filter(Item.id == item_id).first()
@@ -192,23 +207,52 @@ def delete_item_admin(
 def delete_event_admin(
     event_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Delete an event (admin moderation)"""
     event = db.query(Event).filter(Event.id == event_id).first()
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
+    had_tags = bool(event.tags)
     db.delete(event)
     db.commit()
+    if had_tags:
+        tag_facet_cache.clear()
     
     return {"message": "Event deleted successfully"}
 
+@router.post("/maintenance/reconcile-attendance")
+def reconcile_attendance(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
+):
+    """Recompute stored event attendee counts from RSVPs"""
+    return {"events_fixed": reconcile_attendee_counts(db)}
+
 # System Statistics
+@router.get("/stats/user-cache")
+def get_user_cache_stats(current_user: Principal = Depends(require_admin)):
+    """Hit/miss counters for this worker's authenticated-user cache"""
+    return user_cache.stats()
+
+@router.get("/stats/db-pool")
+def get_db_pool_stats(current_user: Principal = Depends(require_admin)):
+    """Connection pool usage and checkout wait times for this worker"""
+    pools = {
+        "sync": pool_status(db_session.engine.pool),
+        "async": pool_status(db_session.async_engine.pool)
+    }
+    if db_session.replica_engine is not None:
+        pools["replica_sync"] = pool_status(db_session.replica_engine.pool)
+        pools["replica_async"] = pool_status(db_session.async_replica_engine.pool)
+    pools["replica"] = replica_monitor.status()
+    return pools
+
 @router.get("/stats/overview")
 def get_system_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(require_admin)
 ):
     """Get overall system statistics"""
     total_users = db.query(User).count()
@@ -264,8 +308,8 @@ def get_system_stats(
 @router.get("/stats/activity")
 def get_activity_timeline(
     days: int = Query(30, ge=1, le=90),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(require_admin)
 ):
     """Get daily activity metrics for the specified number of days"""
     start_date = datetime.utcnow() - timedelta(days=days)
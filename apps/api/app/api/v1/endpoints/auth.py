@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.db.session import get_db
 from app.models.user import User, Profile
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password, verify_password, create_access_token, get_token_version
 from app.core.config import settings
 import logging
 
@@ -92,7 +92,7 @@ def signup(request: SignupRequest, db: Session = Depends(get_db)):
     db.refresh(user)
     
     # Generate token
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_access_token(data={"sub": str(user.id)}, user=user)
     
     return {
         "access_token": access_token,
@@ -121,7 +121,11 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
     profile = db.query(Profile).filter(Profile.user_id == user.id).first()
     
     # Generate token
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_access_token(
+        data={"sub": str(user.id)},
+        user=user,
+        token_version=get_token_version(db, str(user.id))
+    )
     
     return {
         "access_token": access_token,
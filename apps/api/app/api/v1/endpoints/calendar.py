@@ -0,0 +1,179 @@
+"""
+Subscribable per-user calendar feed.
+
+Calendar clients poll the feed URL every few minutes. Each poll runs one
+fingerprint query summarizing the rows the feed is built from; the ETag is
+derived from it, so an unchanged feed costs that query and a 304. A changed
+feed is rendered once, streamed, and cached under its new ETag.
+"""
+import hashlib
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, text, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from icalendar import Event as ICalEvent
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import get_current_user, create_calendar_token, calendar_token_subject
+from app.core.security import get_calendar_token_version, bump_calendar_token_version
+from app.db import session as db_session
+from app.db.session import get_async_db
+from app.models.user import User
+from app.models.event import Event, rsvps
+from app.models.schedule import Schedule
+
+router = APIRouter()
+
+# Rendered feeds keyed by ETag; a changed event or schedule changes the key
+feed_cache = TTLCache(maxsize=settings.CALENDAR_CACHE_MAX_SIZE, ttl=settings.CALENDAR_CACHE_TTL_SECONDS)
+
+# Cheap per-source summaries rather than row hashes: event rows are wide (the
+# search_vector alone), and every poll runs this. Event edits bump updated_at;
+# count and sum(id) catch events entering or leaving the feed. Schedules have
+# no updated_at, but a user has few and they're narrow, so their fields are hashed.
+FINGERPRINT_SQL = text("""
+    SELECT concat_ws('|',
+        (SELECT concat_ws(',', count(*), sum(e.id), max(coalesce(e.updated_at, e.created_at)))
+         FROM events e JOIN rsvps r ON r.event_id = e.id
+         WHERE r.user_id = :user_id AND e.start_time >= :since),
+        (SELECT md5(coalesce(string_agg(
+                    concat_ws(',', s.id, s.day_of_week, s.start_time, s.end_time, s.title, s.venue),
+                    ';' ORDER BY s.id), ''))
+         FROM schedules s WHERE s.user_id = :user_id),
+        (SELECT concat_ws(',', count(*), sum(e.id), max(coalesce(e.updated_at, e.created_at)))
+         FROM events e WHERE e.tags && CAST(:tags AS text[]) AND e.start_time >= :now)
+    )
+""")
+
+CALENDAR_HEADER = (
+    b"BEGIN:VCALENDAR\r\n"
+    b"VERSION:2.0\r\n"
+    b"PRODID:-//CampusConnect//Feed//EN\r\n"
+    b"X-WR-CALNAME:CampusConnect\r\n"
+)
+CALENDAR_FOOTER = b"END:VCALENDAR\r\n"
+
+
+def _parse_tags(tags: Optional[str]) -> List[str]:
+    return sorted({t.strip() for t in (tags or "").split(",") if t.strip()})
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def _first_occurrence(day_of_week: int, on_or_after: date) -> date:
+    # day_of_week is 0=Sun..6=Sat; date.weekday() is 0=Mon..6=Sun
+    return on_or_after + timedelta(days=(day_of_week - 1 - on_or_after.weekday()) % 7)
+
+def _event_component(e: Event) -> bytes:
+    component = ICalEvent()
+    component.add('uid', f'event-{e.id}@campusconnect.com')
+    component.add('summary', e.title)
+    if e.description:
+        component.add('description', e.description)
+    component.add('dtstart', e.start_time)
+    if e.end_time:
+        component.add('dtend', e.end_time)
+    if e.venue:
+        component.add('location', e.venue)
+    component.add('dtstamp', e.updated_at or e.created_at)
+    return component.to_ical()
+
+def _schedule_component(s: Schedule) -> bytes:
+    first = _first_occurrence(s.day_of_week, s.created_at.date())
+    component = ICalEvent()
+    component.add('uid', f'schedule-{s.id}@campusconnect.com')
+    component.add('summary', s.title)
+    component.add('dtstart', datetime.combine(first, s.start_time))
+    component.add('dtend', datetime.combine(first, s.end_time))
+    component.add('rrule', {'freq': 'weekly'})
+    if s.venue:
+        component.add('location', s.venue)
+    component.add('dtstamp', s.created_at)
+    return component.to_ical()
+
+async def _render_feed(etag: str, user_id: str, tags: List[str], since: datetime, now: datetime):
+    # The request's session is closed before a streamed body is sent, so use our own
+    chunks = [CALENDAR_HEADER]
+    yield CALENDAR_HEADER
+    async with db_session.AsyncSessionLocal() as db:
+        event_filter = Event.id.in_(select(rsvps.c.event_id).where(rsvps.c.user_id == user_id))
+        event_filter = and_(event_filter, Event.start_time >= since)
+        if tags:
+            event_filter = or_(event_filter, and_(Event.tags.overlap(tags), Event.start_time >= now))
+        events = await db.stream_scalars(select(Event).where(event_filter).order_by(Event.start_time, Event.id))
+        async for e in events:
+            chunk = _event_component(e)
+            chunks.append(chunk)
+            yield chunk
+        schedules = await db.stream_scalars(select(Schedule).where(Schedule.user_id == user_id).order_by(Schedule.id))
+        async for s in schedules:
+            chunk = _schedule_component(s)
+            chunks.append(chunk)
+            yield chunk
+    chunks.append(CALENDAR_FOOTER)
+    yield CALENDAR_FOOTER
+    feed_cache.set(etag, b"".join(chunks))
+
+
+def _feed_url(request: Request, user_id, version: int) -> dict:
+    token = create_calendar_token(user_id, version)
+    return {"url": str(request.url_for("calendar_feed", token=token))}
+
+@router.get("/feed-url")
+async def get_feed_url(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Subscription URL for the current user's feed; append ?tags=a,b to add upcoming
+    events by tag. It stays valid until rotated with POST /feed-url/rotate.
+    """
+    return _feed_url(request, current_user.id, await get_calendar_token_version(db, current_user.id))
+
+@router.post("/feed-url/rotate")
+async def rotate_feed_url(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Revoke every feed URL issued so far (e.g. one that leaked) and return a new one"""
+    version = await bump_calendar_token_version(db, current_user.id)
+    await db.commit()
+    return _feed_url(request, current_user.id, version)
+
+@router.get("/feed/{token}.ics", name="calendar_feed")
+async def calendar_feed(
+    request: Request,
+    token: str,
+    tags: Optional[str] = Query(None, description="Comma-separated tags of upcoming events to include"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = await calendar_token_subject(db, token)
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="Calendar feed not found")
+
+    tag_list = _parse_tags(tags)
+    now = datetime.utcnow()
+    since = now - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS)
+    fingerprint = await db.scalar(FINGERPRINT_SQL, {"user_id": user_id, "since": since, "now": now, "tags": tag_list})
+    digest = hashlib.md5(f"{user_id}|{','.join(tag_list)}|{fingerprint}".encode()).hexdigest()
+    etag = f'"{digest}"'
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    cached = feed_cache.get(etag)
+    if cached is not None:
+        return Response(content=cached, media_type="text/calendar", headers=headers)
+    return StreamingResponse(
+        _render_feed(etag, user_id, tag_list, since, now),
+        media_type="text/calendar",
+        headers=headers
+    )
@@ -1,16 +1,42 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, Response
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, func, exists, false, literal, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-from app.db.session import get_db
-from app.core.security import get_current_user
+from app.db.session import get_async_db
+from app.db.routing import get_async_read_db
+from app.db.search import event_search
+from app.core.pagination import paginate, next_cursor
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import get_current_user, get_current_principal, Principal
 from app.models.user import User, Profile
 from app.models.event import Event, rsvps
+from app.models.event_attendance import event_stats, event_waitlist
+from app.models.notification import Notification
 from icalendar import Calendar, Event as ICalEvent
 
 router = APIRouter()
 
+# Tag counts for upcoming events. Cleared here on event writes; other workers
+# and events that start (and so stop being upcoming) catch up within the TTL.
+tag_facet_cache = TTLCache(maxsize=1, ttl=settings.EVENT_TAGS_CACHE_TTL_SECONDS)
+
+# Only upcoming events are unnested, found via idx_events_start_time_id
+TAG_COUNTS_SQL = text("""
+    SELECT tag, count(*) AS count
+    FROM events, unnest(events.tags) AS tag
+    WHERE events.start_time >= now()
+    GROUP BY tag
+    ORDER BY count DESC, tag
+""")
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
 class CreateEventRequest(BaseModel):
     title: str
     description: Optional[str] = None
@@ -47,73 +73,171 @@ class EventResponse(BaseModel):
     class Config:
         from_attributes = True
 
+async def _waitlist_position(db: AsyncSession, event_id: int, user_id) -> Optional[int]:
+    joined_at = await db.scalar(select(event_waitlist.c.created_at).where(
+        event_waitlist.c.event_id == event_id,
+        event_waitlist.c.user_id == user_id
+    ))
+    if joined_at is None:
+        return None
+    return await db.scalar(select(func.count()).select_from(event_waitlist).where(
+        event_waitlist.c.event_id == event_id,
+        event_waitlist.c.created_at <= joined_at
+    ))
+
+async def _lock_attendance(db: AsyncSession, event_id: int) -> int:
+    """
+    Lock the event's counter row (creating it if needed) and return the count.
+    RSVPs, cancellations and capacity changes on one event serialize on this
+    lock until the caller commits.
+    """
+    # Seeded from rsvps, so an event that predates event_stats starts from its real count
+    await db.execute(
+        pg_insert(event_stats).from_select(
+            ["event_id", "attendee_count"],
+            select(literal(event_id), func.count()).select_from(rsvps).where(rsvps.c.event_id == event_id)
+        ).on_conflict_do_nothing()
+    )
+    return await db.scalar(
+        select(event_stats.c.attendee_count).where(event_stats.c.event_id == event_id).with_for_update()
+    )
+
+async def _fill_from_waitlist(db: AsyncSession, event: Event, attendee_count: int) -> int:
+    """
+    Move waitlisted users into free seats, longest-waiting first, and notify
+    them. The caller holds the counter lock and commits. Returns the new count.
+    """
+    free = event.max_attendees - attendee_count if event.max_attendees else None
+    if free is not None and free <= 0:
+        return attendee_count
+    next_in_line = (
+        select(event_waitlist.c.user_id)
+        .where(event_waitlist.c.event_id == event.id)
+        .order_by(event_waitlist.c.created_at, event_waitlist.c.user_id)
+        .limit(free)
+    )
+    promoted = (await db.execute(event_waitlist.delete().where(
+        event_waitlist.c.event_id == event.id,
+        event_waitlist.c.user_id.in_(next_in_line)
+    ).returning(event_waitlist.c.user_id))).scalars().all()
+    if not promoted:
+        return attendee_count
+
+    await db.execute(
+        pg_insert(rsvps).values([{"user_id": u, "event_id": event.id} for u in promoted]).on_conflict_do_nothing()
+    )
+    await db.execute(insert(Notification), [{
+        "user_id": u,
+        "type": "rsvp_promoted",
+        "title": "You're off the waitlist!",
+        "message": f"A spot opened up and you are now attending: {event.title}",
+        "link": f"/events/{event.id}",
+    } for u in promoted])
+    return await db.scalar(
+        update(event_stats)
+        .where(event_stats.c.event_id == event.id)
+        .values(attendee_count=event_stats.c.attendee_count + len(promoted))
+        .returning(event_stats.c.attendee_count)
+    )
+
+def event_page_query(user_id=None):
+    """
+    Events with organizer name, stored attendee count and the caller's RSVP flag
+    in a single statement. The RSVP check is a correlated EXISTS on the rsvps
+    primary key, so it only touches the events actually returned.
+    """
+    if user_id is not None:
+        is_rsvped = exists().where(rsvps.c.event_id == Event.id, rsvps.c.user_id == user_id)
+    else:
+        is_rsvped = false()
+    return (
+        select(
+            Event,
+            Profile.name.label("organizer_name"),
+            func.coalesce(event_stats.c.attendee_count, 0).label("attendee_count"),
+            is_rsvped.label("is_rsvped")
+        )
+        .outerjoin(Profile, Profile.user_id == Event.organizer_id)
+        .outerjoin(event_stats, event_stats.c.event_id == Event.id)
+    )
+
+def _event_response(e: Event, organizer_name: Optional[str], attendee_count: int, is_rsvped: bool) -> EventResponse:
+    return EventResponse(
+        id=e.id,
+        title=e.title,
+        description=e.description,
+        start_time=e.start_time,
+        end_time=e.end_time,
+        venue=e.venue,
+        organizer_id=str(e.organizer_id) if e.organizer_id else None,
+        organizer_name=organizer_name,
+        tags=e.tags,
+        max_attendees=e.max_attendees,
+        attendee_count=attendee_count,
+        is_rsvped=is_rsvped,
+        created_at=e.created_at
+    )
+
 @router.get("/", response_model=List[EventResponse])
 @router.get("", response_model=List[EventResponse])
-def list_events(
+async def list_events(
+    response: Response,
     upcoming: Optional[bool] = Query(None),
     q: Optional[str] = Query(None),
     tag: Optional[str] = Query(None),
     limit: int = Query(50, le=100),
     offset: int = Query(0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     current_user: Optional[User] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    query = db.query(Event)
+    query = event_page_query(current_user.id if current_user else None)
     
     # Filter upcoming events
     if upcoming:
-        query = query.filter(Event.start_time >= datetime.utcnow())
+        query = query.where(Event.start_time >= datetime.utcnow())
     
-    # Search by title/description
+    # Search title/tags/description/venue, best matches first
+    rank = None
     if q:
-        query = query.filter(
-            (Event.title.ilike(f"%{q}%")) | (Event.description.ilike(f"%{q}%"))
+        search_filter, rank = event_search(
+            q, db.bind.dialect.name, [Event.title, Event.description, Event.venue]
         )
+        query = query.where(search_filter)
     
     # Filter by tag
     if tag:
-        query = query.filter(Event.tags.contains([tag]))
-    
-    events = query.order_by(Event.start_time.asc()).offset(offset).limit(limit).all()
-    
-    # Get organizer names
-    organizer_ids = [e.organizer_id for e in events if e.organizer_id]
-    name_map = {}
-    if organizer_ids:
-        profiles = db.query(Profile).filter(Profile.user_id.in_(organizer_ids)).all()
-        name_map = {p.user_id: p.name for p in profiles}
-    
-    # Check RSVPs for current user
-    user_rsvps = set()
-    if current_user:
-        user_rsvp_query = db.query(rsvps).filter(rsvps.c.user_id == current_user.id).all()
-        user_rsvps = {r.event_id for r in user_rsvp_query}
-    
-    return [
-        EventResponse(
-            id=e.id,
-            title=e.title,
-            description=e.description,
-            start_time=e.start_time,
-            end_time=e.end_time,
-            venue=e.venue,
-            organizer_id=str(e.organizer_id) if e.organizer_id else None,
-            organizer_name=name_map.get(e.organizer_id),
-            tags=e.tags,
-            max_attendees=e.max_attendees,
-            attendee_count=len(e.attendees),
-            is_rsvped=e.id in user_rsvps,
-            created_at=e.created_at
-        )
-        for e in events
-    ]
+        query = query.where(Event.tags.contains([tag]))
+    
+    if rank is not None:
+        # Relevance order has no stable keyset, so ranked search pages by offset only
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor can't be combined with q; use offset")
+        query = query.order_by(rank.desc())
+    query = paginate(query, [Event.start_time, Event.id], (datetime, int), limit, cursor=cursor, offset=offset)
+    rows, cursor = next_cursor((await db.execute(query)).all(), limit, lambda row: (row[0].start_time, row[0].id))
+    if cursor and rank is None:
+        response.headers["X-Next-Cursor"] = cursor
+    return [_event_response(*row) for row in rows]
+
+@router.get("/tags", response_model=List[TagCount])
+async def list_event_tags(
+    limit: int = Query(100, le=500),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Tags in use on upcoming events, most used first"""
+    counts = tag_facet_cache.get("upcoming")
+    if counts is None:
+        counts = [TagCount(tag=tag, count=n) for tag, n in (await db.execute(TAG_COUNTS_SQL)).all()]
+        tag_facet_cache.set("upcoming", counts)
+    return counts[:limit]
 
 @router.post("/", response_model=EventResponse)
 @router.post("", response_model=EventResponse)
 async def create_event(
     request: CreateEventRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Only faculty and admin can create events
     if current_user.role not in ["faculty", "admin"]:
@@ -131,11 +255,15 @@ async def create_event(
     )
     
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await db.flush()
+    await db.execute(event_stats.insert().values(event_id=event.id, attendee_count=0))
+    await db.commit()
+    if event.tags:
+        tag_facet_cache.clear()
+    await db.refresh(event)
     
     # Get organizer name
-    organizer_profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    organizer_profile = await db.get(Profile, current_user.id)
     
     return EventResponse(
         id=event.id,
@@ -154,51 +282,27 @@ async def create_event(
     )
 
 @router.get("/{event_id}", response_model=EventResponse)
-def get_event(
+async def get_event(
     event_id: int,
     current_user: Optional[User] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
+    row = (await db.execute(
+        event_page_query(current_user.id if current_user else None).where(Event.id == event_id)
+    )).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    # Get organizer name
-    organizer_profile = db.query(Profile).filter(Profile.user_id == event.organizer_id).first() if event.organizer_id else None
-    
-    # Check if current user has RSVPed
-    is_rsvped = False
-    if current_user:
-        rsvp_exists = db.query(rsvps).filter(
-            rsvps.c.user_id == current_user.id,
-            rsvps.c.event_id == event_id
-        ).first()
-        is_rsvped = rsvp_exists is not None
-    
-    return EventResponse(
-        id=event.id,
-        title=event.title,
-        description=event.description,
-        start_time=event.start_time,
-        end_time=event.end_time,
-        venue=event.venue,
-        organizer_id=str(event.organizer_id) if event.organizer_id else None,
-        organizer_name=organizer_profile.name if organizer_profile else None,
-        tags=event.tags,
-        max_attendees=event.max_attendees,
-        attendee_count=len(event.attendees),
-        is_rsvped=is_rsvped,
-        created_at=event.created_at
-    )
+    return _event_response(*row)
 
 @router.patch("/{event_id}", response_model=EventResponse)
 async def update_event(
     event_id: int,
     request: UpdateEventRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -219,41 +323,26 @@ async def update_event(
     if request.tags is not None:
         event.tags = request.tags
     if request.max_attendees is not None:
+        # Raising or clearing the limit opens seats for the waitlist
+        attendee_count = await _lock_attendance(db, event_id)
         event.max_attendees = request.max_attendees
+        await _fill_from_waitlist(db, event, attendee_count)
     
     event.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(event)
-    
-    organizer_profile = db.query(Profile).filter(Profile.user_id == event.organizer_id).first()
-    is_rsvped = db.query(rsvps).filter(
-        rsvps.c.user_id == current_user.id,
-        rsvps.c.event_id == event_id
-    ).first() is not None
+    await db.commit()
+    if request.tags is not None or request.start_time is not None:
+        tag_facet_cache.clear()
     
-    return EventResponse(
-        id=event.id,
-        title=event.title,
-        description=event.description,
-        start_time=event.start_time,
-        end_time=event.end_time,
-        venue=event.venue,
-        organizer_id=str(event.organizer_id),
-        organizer_name=organizer_profile.name if organizer_profile else None,
-        tags=event.tags,
-        max_attendees=event.max_attendees,
-        attendee_count=len(event.attendees),
-        is_rsvped=is_rsvped,
-        created_at=event.created_at
-    )
+    row = (await db.execute(event_page_query(current_user.id).where(Event.id == event_id))).first()
+    return _event_response(*row)
 
 @router.delete("/{event_id}")
 async def delete_event(
     event_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -261,8 +350,11 @@ async def delete_event(
     if event.organizer_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    db.delete(event)
-    db.commit()
+    had_tags = bool(event.tags)
+    await db.delete(event)
+    await db.commit()
+    if had_tags:
+        tag_facet_cache.clear()
     
     return {"message": "Event deleted successfully"}
 
@@ -270,65 +362,102 @@ async def delete_event(
 async def rsvp_event(
     event_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    # Check if already RSVPed
-    existing_rsvp = db.query(rsvps).filter(
-        rsvps.c.user_id == current_user.id,
-        rsvps.c.event_id == event_id
-    ).first()
+    # Held until commit, so the capacity check and the seat or waitlist write
+    # below happen atomically with respect to other RSVPs and cancellations
+    attendee_count = await _lock_attendance(db, event_id)
+    max_attendees = await db.scalar(select(Event.max_attendees).where(Event.id == event_id))
     
-    if existing_rsvp:
+    # Add RSVP; the primary key rejects a duplicate
+    inserted = await db.scalar(
+        pg_insert(rsvps).values(user_id=current_user.id, event_id=event_id)
+        .on_conflict_do_nothing().returning(rsvps.c.event_id)
+    )
+    if inserted is None:
         raise HTTPException(status_code=400, detail="Already RSVPed to this event")
     
-    # Check max attendees
-    if event.max_attendees and len(event.attendees) >= event.max_attendees:
-        raise HTTPException(status_code=400, detail="Event is full")
+    if max_attendees and attendee_count >= max_attendees:
+        # Full: undo the RSVP and join the waitlist instead, in the same transaction
+        await db.execute(rsvps.delete().where(
+            rsvps.c.user_id == current_user.id,
+            rsvps.c.event_id == event_id
+        ))
+        await db.execute(
+            pg_insert(event_waitlist).values(event_id=event_id, user_id=current_user.id).on_conflict_do_nothing()
+        )
+        await db.commit()
+        return {
+            "message": "Event is full, you have been added to the waitlist",
+            "waitlisted": True,
+            "waitlist_position": await _waitlist_position(db, event_id, current_user.id)
+        }
     
-    # Add RSVP
-    db.execute(rsvps.insert().values(user_id=current_user.id, event_id=event_id))
-    db.commit()
+    attendee_count = await db.scalar(
+        update(event_stats)
+        .where(event_stats.c.event_id == event_id)
+        .values(attendee_count=event_stats.c.attendee_count + 1)
+        .returning(event_stats.c.attendee_count)
+    )
+    await db.execute(event_waitlist.delete().where(
+        event_waitlist.c.event_id == event_id,
+        event_waitlist.c.user_id == current_user.id
+    ))
+    await db.commit()
     
-    return {"message": "RSVP successful", "attendee_count": len(event.attendees) + 1}
+    return {"message": "RSVP successful", "attendee_count": attendee_count, "waitlisted": False}
 
 @router.delete("/{event_id}/rsvp")
 async def cancel_rsvp(
     event_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    # Check if RSVPed
-    existing_rsvp = db.query(rsvps).filter(
-        rsvps.c.user_id == current_user.id,
-        rsvps.c.event_id == event_id
-    ).first()
-    
-    if not existing_rsvp:
-        raise HTTPException(status_code=400, detail="Not RSVPed to this event")
+    # Same lock as rsvp_event, taken before the waitlist is looked at
+    await _lock_attendance(db, event_id)
     
     # Remove RSVP
-    db.execute(rsvps.delete().where(
+    removed = await db.scalar(rsvps.delete().where(
         rsvps.c.user_id == current_user.id,
         rsvps.c.event_id == event_id
-    ))
-    db.commit()
+    ).returning(rsvps.c.event_id))
+    if removed is None:
+        # Not attending; they may be leaving the waitlist instead
+        left = await db.scalar(event_waitlist.delete().where(
+            event_waitlist.c.event_id == event_id,
+            event_waitlist.c.user_id == current_user.id
+        ).returning(event_waitlist.c.user_id))
+        if left is None:
+            raise HTTPException(status_code=400, detail="Not RSVPed to this event")
+        await db.commit()
+        return {"message": "Removed from waitlist"}
+    
+    attendee_count = await db.scalar(
+        update(event_stats)
+        .where(event_stats.c.event_id == event_id)
+        .values(attendee_count=func.greatest(event_stats.c.attendee_count - 1, 0))
+        .returning(event_stats.c.attendee_count)
+    )
+    # Hand the freed seat to the longest-waiting user
+    await _fill_from_waitlist(db, event, attendee_count)
+    await db.commit()
     
     return {"message": "RSVP cancelled"}
 
 @router.get("/{event_id}/ics")
-def export_ics(
+async def export_ics(
     event_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -5,8 +5,9 @@ from sqlalchemy import func
 from datetime import datetime
 from app.db.session import get_db
 from app.models.feedback import Feedback, FeedbackToken
-from app.models.user import User
-from app.core.security import get_current_user
+from app.core.security import Principal
+from app.core.permissions import require_admin
+from app.core.pagination import paginate, next_cursor
 import secrets
 import logging
 
@@ -26,11 +27,6 @@ class FeedbackUpdate(BaseModel):
 class TokenGenerate(BaseModel):
     count: int = 10
 
-def require_admin(current_user: User = Depends(get_current_user)):
-    if current_user.role != "admin":
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return current_user
-
 @router.post("/submit")
 def submit_feedback(request: FeedbackSubmit, db: Session = Depends(get_db)):
     """Submit anonymous feedback using a valid token"""
@@ -77,8 +73,9 @@ def list_feedback_admin(
     category: str | None = Query(None),
     skip: int = 0,
     limit: int = 50,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Admin endpoint to list all feedback with optional filters"""
     query = db.query(Feedback)
@@ -89,7 +86,10 @@ def list_feedback_admin(
         query = query.filter(Feedback.category == category)
     
     total = query.count()
-    feedbacks = query.order_by(Feedback.created_at.desc()).offset(skip).limit(limit).all()
+    feedbacks, cursor = next_cursor(paginate(
+        query, [Feedback.created_at, Feedback.id], (datetime, int), limit,
+        cursor=cursor, offset=skip, descending=True
+    ).all(), limit, lambda f: (f.created_at, f.id))
     
     return {
         "total": total,
@@ -105,13 +105,14 @@ def list_feedback_admin(
                 "resolved_at": f.resolved_at
             }
             for f in feedbacks
-        ]
+        ],
+        "next_cursor": cursor
     }
 
 @router.get("/admin/stats")
 def get_feedback_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Get feedback statistics"""
     total = db.query(Feedback).count()
@@ -136,7 +137,7 @@ def update_feedback(
     feedback_id: int,
     request: FeedbackUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Update feedback status and add admin notes"""
     feedback = db.query(Feedback).filter(Feedback.id == feedback_id).first()
@@ -163,7 +164,7 @@ def update_feedback(
 def generate_tokens(
     request: TokenGenerate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Generate feedback tokens for distribution"""
     if request.count < 1 or request.count > 1000:
@@ -187,7 +188,7 @@ def generate_tokens(
 @router.get("/admin/tokens/stats")
 def get_token_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Get token usage statistics"""
     total = db.query(FeedbackToken).count()
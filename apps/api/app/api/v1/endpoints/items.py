@@ -1,17 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, Body
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Response, UploadFile, File
+from sqlalchemy import select, delete, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
-from app.db.session import get_db
+import numpy as np
+from app.db.session import get_async_db
+from app.db.routing import get_async_read_db
 from app.core.security import get_current_user
+from app.core.pagination import paginate, next_cursor
+from app.db.search import item_search, SET_WORD_SIMILARITY_SQL
+from app.core.config import settings
+from app.core.images import variant_url
+from app.ml.embeddings import embed_image_bytes
+from app.ml.similarity import query_pool, nearest_items, item_embedding
 from app.models.user import User
 from app.models.item import Item, ItemClaim
+from app.models.item_match import item_match_scans
 from app.models.user import Profile
 from app.api.v1.endpoints.notifications import create_notification
 
 router = APIRouter()
 
+ImageSize = Literal["thumb", "medium", "full"]
+
+# Fields that feed the item's embedding (app.ml.embeddings.item_text)
+EMBEDDED_FIELDS = ("title", "description", "category", "location")
+
+RESET_EMBEDDING_SQL = text("UPDATE items SET embedding = NULL WHERE id = :id")
+
 class CreateItemRequest(BaseModel):
     title: str
     description: Optional[str] = None
@@ -43,6 +60,9 @@ class ItemResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class SimilarItemResponse(ItemResponse):
+    similarity: float  # cosine similarity, 1.0 = identical
+
 class ClaimRequest(BaseModel):
     message: Optional[str] = None
 
@@ -50,41 +70,19 @@ class UpdateClaimRequest(BaseModel):
     status: str  # 'approved' | 'rejected' | 'pending' (pending used for undo)
     reason: Optional[str] = None
 
-@router.get("/", response_model=List[ItemResponse])
-@router.get("", response_model=List[ItemResponse])
-def list_items(
-    status: Optional[str] = Query(None),
-    category: Optional[str] = Query(None),
-    q: Optional[str] = Query(None),
-    limit: int = Query(50, le=100),
-    offset: int = Query(0),
-    db: Session = Depends(get_db)
-):
-    query = db.query(Item)
-    
-    if status:
-        query = query.filter(Item.status == status)
-    if category:
-        query = query.filter(Item.category == category)
-    if q:
-        query = query.filter(
-            (Item.title.ilike(f"%{q}%")) | (Item.description.ilike(f"%{q}%"))
-        )
-    
-    items = query.order_by(Item.created_at.desc()).offset(offset).limit(limit).all()
-
+async def _item_responses(db: AsyncSession, items, image_size: str = "full") -> List[ItemResponse]:
     # Map user_id -> name for finder and claimant
     user_ids = set([i.finder_id for i in items if i.finder_id] + [i.claimant_id for i in items if i.claimant_id])
     name_map = {}
     if user_ids:
-        profiles = db.query(Profile).filter(Profile.user_id.in_(list(user_ids))).all()
+        profiles = (await db.scalars(select(Profile).where(Profile.user_id.in_(list(user_ids))))).all()
         name_map = {p.user_id: p.name for p in profiles}
 
     return [ItemResponse(
         id=i.id,
         title=i.title,
         description=i.description,
-        image_url=i.image_url,
+        image_url=variant_url(i.image_url, image_size),
         status=i.status,
         category=i.category,
         location=i.location,
@@ -95,12 +93,62 @@ def list_items(
         created_at=i.created_at
     ) for i in items]
 
+async def _similar_responses(db: AsyncSession, matches) -> List["SimilarItemResponse"]:
+    items = {i.id: i for i in (await db.scalars(select(Item).where(Item.id.in_([m[0] for m in matches])))).all()}
+    ranked = [items[item_id] for item_id, _ in matches if item_id in items]
+    scores = dict(matches)
+    return [
+        SimilarItemResponse(**r.model_dump(), similarity=round(scores[r.id], 4))
+        for r in await _item_responses(db, ranked, image_size="thumb")
+    ]
+
+@router.get("/", response_model=List[ItemResponse])
+@router.get("", response_model=List[ItemResponse])
+async def list_items(
+    response: Response,
+    status: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    q: Optional[str] = Query(None),
+    limit: int = Query(50, le=100),
+    offset: int = Query(0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    image_size: ImageSize = Query("thumb", description="Which image variant image_url points to"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """`q` matches title, description, category and location, tolerating typos; results are ranked by relevance"""
+    query = select(Item)
+    
+    if status:
+        query = query.where(Item.status == status)
+    if category:
+        query = query.where(Item.category == category)
+    rank = None
+    if q and q.strip():
+        # Filters and search are served together by idx_items_search
+        search_filter, rank = item_search(
+            q.strip(), db.bind.dialect.name, [Item.title, Item.description, Item.category, Item.location]
+        )
+        query = query.where(search_filter)
+    
+    if rank is not None:
+        # Relevance order has no stable keyset, so ranked search pages by offset only
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor can't be combined with q; use offset")
+        await db.execute(SET_WORD_SIMILARITY_SQL, {"threshold": str(settings.ITEM_SEARCH_SIMILARITY_THRESHOLD)})
+        query = query.order_by(rank.desc())
+    query = paginate(query, [Item.created_at, Item.id], (datetime, int), limit, cursor=cursor, offset=offset, descending=True)
+    items, cursor = next_cursor((await db.scalars(query)).all(), limit, lambda i: (i.created_at, i.id))
+    if cursor and rank is None:
+        response.headers["X-Next-Cursor"] = cursor
+
+    return await _item_responses(db, items, image_size)
+
 @router.post("/", response_model=ItemResponse)
 @router.post("", response_model=ItemResponse)
 async def create_item(
     request: CreateItemRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     item = Item(
         title=request.title,
@@ -112,8 +160,8 @@ async def create_item(
         status="active"
     )
     db.add(item)
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    await db.refresh(item)
     
     return ItemResponse(
         id=item.id,
@@ -128,15 +176,52 @@ async def create_item(
         created_at=item.created_at
     )
 
+@router.post("/search/by-image", response_model=List[SimilarItemResponse])
+async def search_by_image(
+    file: UploadFile = File(...),
+    k: int = Query(10, ge=1, le=50),
+    probes: int = Query(settings.VECTOR_SEARCH_PROBES, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Active items whose photo or description best matches an uploaded photo"""
+    if not file.content_type or not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    data = await file.read(settings.EMBEDDING_MAX_IMAGE_BYTES + 1)
+    if len(data) > settings.EMBEDDING_MAX_IMAGE_BYTES:
+        raise HTTPException(status_code=413, detail="Image is too large")
+    try:
+        query = np.asarray(await query_pool.run_async(embed_image_bytes, data), dtype=np.float32)
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=400, detail="Could not read image")
+    return await _similar_responses(db, await nearest_items(db, query, k, probes))
+
+@router.get("/{item_id}/similar", response_model=List[SimilarItemResponse])
+async def similar_items(
+    item_id: int,
+    k: int = Query(10, ge=1, le=50),
+    probes: int = Query(settings.VECTOR_SEARCH_PROBES, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Nearest active items to this one by embedding"""
+    if not await db.scalar(select(Item.id).where(Item.id == item_id)):
+        raise HTTPException(status_code=404, detail="Item not found")
+    query = await item_embedding(db, item_id)
+    if query is None:
+        raise HTTPException(status_code=409, detail="Item has not been indexed yet, try again shortly")
+    return await _similar_responses(db, await nearest_items(db, query, k, probes, exclude_id=item_id))
+
 @router.get("/{item_id}", response_model=ItemResponse)
-def get_item(item_id: int, db: Session = Depends(get_db)):
-    item = db.query(Item).filter(Item.id == item_id).first()
+async def get_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
     # Names
-    finder_profile = db.query(Profile).filter(Profile.user_id == item.finder_id).first() if item.finder_id else None
-    claimant_profile = db.query(Profile).filter(Profile.user_id == item.claimant_id).first() if item.claimant_id else None
+    finder_profile = await db.get(Profile, item.finder_id) if item.finder_id else None
+    claimant_profile = await db.get(Profile, item.claimant_id) if item.claimant_id else None
 
     return ItemResponse(
         id=item.id,
@@ -158,9 +243,9 @@ async def update_item(
     item_id: int,
     request: UpdateItemRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
@@ -168,6 +253,10 @@ async def update_item(
     if item.finder_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    text_changed = any(
+        getattr(request, field) is not None and getattr(request, field) != getattr(item, field)
+        for field in EMBEDDED_FIELDS
+    )
     if request.title is not None:
         item.title = request.title
     if request.description is not None:
@@ -179,8 +268,13 @@ async def update_item(
     if request.status is not None:
         item.status = request.status
     
-    db.commit()
-    db.refresh(item)
+    if text_changed:
+        # Re-encoded by the embedding worker, then rescored by the matcher
+        await db.execute(RESET_EMBEDDING_SQL, {"id": item_id})
+        await db.execute(delete(item_match_scans).where(item_match_scans.c.item_id == item_id))
+    
+    await db.commit()
+    await db.refresh(item)
     
     return ItemResponse(
         id=item.id,
@@ -199,9 +293,9 @@ async def update_item(
 async def delete_item(
     item_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
@@ -209,8 +303,8 @@ async def delete_item(
     if item.finder_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    db.delete(item)
-    db.commit()
+    await db.delete(item)
+    await db.commit()
     
     return {"message": "Item deleted"}
 
@@ -219,9 +313,9 @@ async def claim_item(
     item_id: int,
     request: ClaimRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
@@ -229,10 +323,10 @@ async def claim_item(
         raise HTTPException(status_code=400, detail="Item is not available for claims")
     
     # Check if user already claimed
-    existing = db.query(ItemClaim).filter(
+    existing = await db.scalar(select(ItemClaim).where(
         ItemClaim.item_id == item_id,
         ItemClaim.claimant_id == current_user.id
-    ).first()
+    ))
     if existing:
         raise HTTPException(status_code=400, detail="You already claimed this item")
     
@@ -243,12 +337,12 @@ async def claim_item(
         status="pending"
     )
     db.add(claim)
-    db.commit()
-    db.refresh(claim)
+    await db.commit()
+    await db.refresh(claim)
     
     # Notify item finder
     if item.finder_id:
-        create_notification(
+        await create_notification(
             db=db,
             user_id=str(item.finder_id),
             notification_type="claim_made",
@@ -263,9 +357,9 @@ async def claim_item(
 async def get_item_claims(
     item_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
@@ -273,10 +367,10 @@ async def get_item_claims(
     if item.finder_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    claims = db.query(ItemClaim).filter(ItemClaim.item_id == item_id).all()
+    claims = (await db.scalars(select(ItemClaim).where(ItemClaim.item_id == item_id))).all()
     # Add claimant names
     claimant_ids = [c.claimant_id for c in claims if c.claimant_id]
-    profiles = db.query(Profile).filter(Profile.user_id.in_(claimant_ids)).all() if claimant_ids else []
+    profiles = (await db.scalars(select(Profile).where(Profile.user_id.in_(claimant_ids)))).all() if claimant_ids else []
     name_map = {p.user_id: p.name for p in profiles}
     return [{"id": c.id, "claimant_id": str(c.claimant_id), "claimant_name": name_map.get(c.claimant_id), "message": c.message, "status": c.status, "created_at": c.created_at} for c in claims]
 
@@ -287,13 +381,13 @@ async def update_claim(
     payload: UpdateClaimRequest = Body(default=None),
     status: Optional[str] = None,  # fallback for legacy query param usage
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     new_status = (payload.status if payload else None) or status
     if new_status not in ["approved", "rejected", "pending"]:
         raise HTTPException(status_code=400, detail="Invalid status")
 
-    item = db.query(Item).filter(Item.id == item_id).first()
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
@@ -301,10 +395,10 @@ async def update_claim(
     if item.finder_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    claim = db.query(ItemClaim).filter(
+    claim = await db.scalar(select(ItemClaim).where(
         ItemClaim.id == claim_id,
         ItemClaim.item_id == item_id
-    ).first()
+    ))
     if not claim:
         raise HTTPException(status_code=404, detail="Claim not found")
 
@@ -317,7 +411,7 @@ async def update_claim(
         item.claimant_id = claim.claimant_id
         
         # Notify claimant
-        create_notification(
+        await create_notification(
             db=db,
             user_id=str(claim.claimant_id),
             notification_type="claim_approved",
@@ -327,15 +421,15 @@ async def update_claim(
         )
         
         # Auto-reject all other pending claims for this item
-        others = db.query(ItemClaim).filter(
+        others = (await db.scalars(select(ItemClaim).where(
             ItemClaim.item_id == item_id,
             ItemClaim.id != claim_id,
             ItemClaim.status == "pending",
-        ).all()
+        ))).all()
         for c in others:
             c.status = "rejected"
             # Notify rejected claimants
-            create_notification(
+            await create_notification(
                 db=db,
                 user_id=str(c.claimant_id),
                 notification_type="claim_rejected",
@@ -349,7 +443,7 @@ async def update_claim(
         claim.status = "rejected"
         
         # Notify claimant
-        create_notification(
+        await create_notification(
             db=db,
             user_id=str(claim.claimant_id),
             notification_type="claim_rejected",
@@ -361,11 +455,11 @@ async def update_claim(
         # If it was previously approved and belongs to current claimant, reopen item
         if previous_status == "approved" and item.claimant_id == claim.claimant_id:
             # If no other approved claims remain, mark item active
-            other_approved = db.query(ItemClaim).filter(
+            other_approved = await db.scalar(select(ItemClaim).where(
                 ItemClaim.item_id == item_id,
                 ItemClaim.id != claim_id,
                 ItemClaim.status == "approved",
-            ).first()
+            ))
             if not other_approved:
                 item.status = "active"
                 item.claimant_id = None
@@ -376,15 +470,15 @@ async def update_claim(
             claim.status = "pending"
             if previous_status == "approved" and item.claimant_id == claim.claimant_id:
                 # If no other approved claims, reopen item
-                other_approved = db.query(ItemClaim).filter(
+                other_approved = await db.scalar(select(ItemClaim).where(
                     ItemClaim.item_id == item_id,
                     ItemClaim.id != claim_id,
                     ItemClaim.status == "approved",
-                ).first()
+                ))
                 if not other_approved:
                     item.status = "active"
                     item.claimant_id = None
 
-    db.commit()
+    await db.commit()
     return {"message": f"Claim {new_status}"}
 
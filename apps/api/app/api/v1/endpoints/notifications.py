@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from datetime import datetime
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
+from app.db.routing import get_async_read_db
 from app.models.notification import Notification
 from app.models.user import User
 from app.core.security import get_current_user
+from app.core.pagination import paginate, next_cursor
 
 router = APIRouter()
 
@@ -15,7 +19,7 @@ class NotificationCreate(BaseModel):
     message: str
     link: str | None = None
 
-def create_notification(db: Session, user_id: str, notification_type: str, title: str, message: str, link: str = None):
+async def create_notification(db: AsyncSession, user_id: str, notification_type: str, title: str, message: str, link: str = None):
     """Helper function to create a notification"""
     notification = Notification(
         user_id=user_id,
@@ -25,32 +29,36 @@ def create_notification(db: Session, user_id: str, notification_type: str, title
         link=link
     )
     db.add(notification)
-    db.commit()
+    await db.commit()
     return notification
 
 @router.get("/")
-def get_notifications(
+async def get_notifications(
     unread_only: bool = False,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get notifications for the current user"""
-    query = db.query(Notification).filter(Notification.user_id == current_user.id)
+    query = select(Notification).where(Notification.user_id == current_user.id)
     
     if unread_only:
-        query = query.filter(Notification.read == False)
+        query = query.where(Notification.read == False)
     
-    total = query.count()
-    notifications = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    notifications, cursor = next_cursor((await db.scalars(paginate(
+        query, [Notification.created_at, Notification.id], (datetime, int), limit,
+        cursor=cursor, offset=skip, descending=True
+    ))).all(), limit, lambda n: (n.created_at, n.id))
     
     return {
         "total": total,
-        "unread": db.query(Notification).filter(
+        "unread": await db.scalar(select(func.count()).select_from(Notification).where(
             Notification.user_id == current_user.id,
             Notification.read == False
-        ).count(),
+        )),
         "notifications": [
             {
                 "id": n.id,
@@ -62,60 +70,61 @@ def get_notifications(
                 "created_at": n.created_at
             }
             for n in notifications
-        ]
+        ],
+        "next_cursor": cursor
     }
 
 @router.patch("/{notification_id}/read")
-def mark_as_read(
+async def mark_as_read(
     notification_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mark a notification as read"""
-    notification = db.query(Notification).filter(
+    notification = await db.scalar(select(Notification).where(
         Notification.id == notification_id,
         Notification.user_id == current_user.id
-    ).first()
+    ))
     
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
     
     notification.read = True
-    db.commit()
+    await db.commit()
     
     return {"id": notification.id, "read": notification.read}
 
 @router.post("/mark-all-read")
-def mark_all_as_read(
-    db: Session = Depends(get_db),
+async def mark_all_as_read(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mark all notifications as read for the current user"""
-    db.query(Notification).filter(
+    await db.execute(update(Notification).where(
         Notification.user_id == current_user.id,
         Notification.read == False
-    ).update({"read": True})
-    db.commit()
+    ).values(read=True))
+    await db.commit()
     
     return {"message": "All notifications marked as read"}
 
 @router.delete("/{notification_id}")
-def delete_notification(
+async def delete_notification(
     notification_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a notification"""
-    notification = db.query(Notification).filter(
+    notification = await db.scalar(select(Notification).where(
         Notification.id == notification_id,
         Notification.user_id == current_user.id
-    ).first()
+    ))
     
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
     
-    db.delete(notification)
-    db.commit()
+    await db.delete(notification)
+    await db.commit()
     
     return {"message": "Notification deleted"}
 
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends, Body
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import time, datetime, timedelta
-from app.db.session import get_db
+from app.db.session import get_async_db
+from app.db.routing import get_async_read_db
 from app.core.security import get_current_user
 from app.models.user import User, Profile
 from app.models.schedule import Schedule
@@ -53,13 +55,13 @@ def str_to_time(s: str) -> time:
     return time(hour=h, minute=m)
 
 @router.get("/me", response_model=List[ScheduleResponse])
-def get_my_schedule(
+async def get_my_schedule(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    schedules = db.query(Schedule).filter(
+    schedules = (await db.scalars(select(Schedule).where(
         Schedule.user_id == current_user.id
-    ).order_by(Schedule.day_of_week, Schedule.start_time).all()
+    ).order_by(Schedule.day_of_week, Schedule.start_time))).all()
     
     return [
         ScheduleResponse(
@@ -79,7 +81,7 @@ def get_my_schedule(
 async def create_schedule(
     request: CreateScheduleRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Validate day_of_week
     if not 0 <= request.day_of_week <= 6:
@@ -105,8 +107,8 @@ async def create_schedule(
     )
     
     db.add(schedule)
-    db.commit()
-    db.refresh(schedule)
+    await db.commit()
+    await db.refresh(schedule)
     
     return ScheduleResponse(
         id=schedule.id,
@@ -123,9 +125,9 @@ async def update_schedule(
     schedule_id: int,
     request: UpdateScheduleRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    schedule = db.query(Schedule).filter(Schedule.id == schedule_id).first()
+    schedule = await db.get(Schedule, schedule_id)
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
     
@@ -158,8 +160,8 @@ async def update_schedule(
     if request.venue is not None:
         schedule.venue = request.venue
     
-    db.commit()
-    db.refresh(schedule)
+    await db.commit()
+    await db.refresh(schedule)
     
     return ScheduleResponse(
         id=schedule.id,
@@ -175,17 +177,17 @@ async def update_schedule(
 async def delete_schedule(
     schedule_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    schedule = db.query(Schedule).filter(Schedule.id == schedule_id).first()
+    schedule = await db.get(Schedule, schedule_id)
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
     
     if schedule.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    db.delete(schedule)
-    db.commit()
+    await db.delete(schedule)
+    await db.commit()
     
     return {"message": "Schedule deleted successfully"}
 
@@ -193,7 +195,7 @@ async def delete_schedule(
 async def find_free_slots(
     request: FreeSlotsRequest = Body(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Include current user in the search
     all_user_ids = list(set([str(current_user.id)] + request.user_ids))
@@ -208,19 +210,20 @@ async def find_free_slots(
     # Determine which days to check
     days_to_check = [request.day_of_week] if request.day_of_week is not None else list(range(7))
     
+    # Get all schedules for all users on these days in one query
+    schedules = (await db.scalars(select(Schedule).where(
+        Schedule.user_id.in_(user_uuids),
+        Schedule.day_of_week.in_(days_to_check)
+    ).order_by(Schedule.start_time))).all()
+    
     free_slots = []
     
     for day in days_to_check:
-        # Get all schedules for all users on this day
-        schedules = db.query(Schedule).filter(
-            Schedule.user_id.in_(user_uuids),
-            Schedule.day_of_week == day
-        ).order_by(Schedule.start_time).all()
-        
         # Group by user to find overlapping busy times
         busy_times = []
         for schedule in schedules:
-            busy_times.append((schedule.start_time, schedule.end_time))
+            if schedule.day_of_week == day:
+                busy_times.append((schedule.start_time, schedule.end_time))
         
         # Merge overlapping intervals
         if busy_times:
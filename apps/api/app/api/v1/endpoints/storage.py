@@ -0,0 +1,61 @@
+import mimetypes
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.security import upload_token_claims
+from app.db.session import get_async_db
+from app.models.direct_upload import direct_uploads
+from app.storage.backend import get_storage
+from app.storage.images import UPLOAD_BUCKET, upload_id_from_path
+from app.storage.local import RangeFileResponse
+
+# Only mounted when STORAGE_BACKEND is "local"
+router = APIRouter()
+
+@router.put("/upload/{token}", status_code=201)
+async def put_object(token: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Target of the signed URLs from /upload/presign; each accepts one upload"""
+    claims = upload_token_claims(token)
+    if claims is None:
+        raise HTTPException(status_code=403, detail="Upload URL is invalid or has expired")
+    if request.headers.get("content-type", "").split(";")[0].strip() != claims["ct"]:
+        raise HTTPException(status_code=400, detail="Content-Type does not match the signed upload")
+    # Once /complete has checked the file it must not change under the worker
+    upload_status = await db.scalar(
+        select(direct_uploads.c.status).where(direct_uploads.c.id == upload_id_from_path(claims["path"]))
+    )
+    # Not held while the body streams in
+    await db.close()
+    if upload_status != "pending":
+        raise HTTPException(status_code=409, detail="Upload is no longer awaiting a file")
+    try:
+        stored = await get_storage().write_stream(claims["bucket"], claims["path"], request.stream(), claims["max"])
+    except FileExistsError:
+        raise HTTPException(status_code=409, detail="File has already been uploaded")
+    if not stored:
+        raise HTTPException(status_code=413, detail=f"File exceeds {claims['max']} bytes")
+    return {"path": claims["path"]}
+
+@router.api_route("/{bucket}/{path:path}", methods=["GET", "HEAD"])
+async def serve_object(bucket: str, path: str, request: Request):
+    # Only processed variants are public; originals keep their EXIF/GPS metadata
+    if bucket != UPLOAD_BUCKET:
+        raise HTTPException(status_code=404, detail="Not found")
+    full_path = get_storage().resolve(bucket, path)
+    if not full_path.is_file():
+        raise HTTPException(status_code=404, detail="Not found")
+    media_type = mimetypes.guess_type(full_path.name)[0] or "application/octet-stream"
+
+    if settings.LOCAL_STORAGE_ACCEL_REDIRECT:
+        # nginx serves the file (sendfile, ranges) from its internal location
+        prefix = settings.LOCAL_STORAGE_ACCEL_REDIRECT.rstrip("/")
+        return Response(headers={"X-Accel-Redirect": f"{prefix}/{bucket}/{path}"}, media_type=media_type)
+
+    return RangeFileResponse(
+        full_path,
+        media_type=media_type,
+        range_header=request.headers.get("range"),
+        if_none_match=request.headers.get("if-none-match"),
+        method=request.method
+    )
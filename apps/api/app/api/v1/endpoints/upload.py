@@ -1,41 +1,208 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-import requests
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import os
+import tempfile
 from app.core.config import settings
+from app.core.images import process_image, DEFAULT_VARIANT
+from app.core.process_pool import BoundedProcessPool
 from app.core.security import get_current_user
+from app.db import session as db_session
+from app.db.session import get_async_db
 from app.models.user import User
+from app.models.direct_upload import direct_uploads
+from app.storage.backend import get_storage
+from app.storage.images import find_duplicate, variant_urls, store_variants, record_hash, original_path
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
 
 router = APIRouter()
 
-@router.post("/image")
+# Uploads in flight in this process; beyond this callers get an immediate 503
+upload_slots = asyncio.Semaphore(settings.UPLOAD_MAX_CONCURRENCY)
+
+# Decoding and re-encoding images is CPU-bound, so it runs outside the event loop's process
+image_pool = BoundedProcessPool(
+    name="image-processing",
+    max_workers=settings.IMAGE_PROCESSING_WORKERS,
+    max_pending=settings.IMAGE_PROCESSING_MAX_PENDING,
+    timeout=settings.IMAGE_PROCESSING_TIMEOUT_SECONDS
+)
+
+class UploadTooLarge(Exception):
+    pass
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File exceeds {settings.UPLOAD_MAX_BYTES} bytes")
+
+def check_content_length(request: Request):
+    """Reject oversized uploads from the header, before the body is parsed"""
+    length = request.headers.get("content-length")
+    # Allow for the multipart envelope around the file
+    if length and length.isdigit() and int(length) > settings.UPLOAD_MAX_BYTES + 64 * 1024:
+        raise _too_large()
+
+class PresignRequest(BaseModel):
+    content_type: str
+
+def _upload_status(row) -> dict:
+    done = row.status in ("ready", "duplicate")
+    return {
+        "upload_id": row.id,
+        "status": row.status,
+        "url": row.url if done else None,
+        "variants": variant_urls(row.url) if done else None,
+        "duplicate": row.status == "duplicate",
+    }
+
+async def _get_upload(db: AsyncSession, upload_id: UUID, user_id):
+    row = (await db.execute(
+        select(direct_uploads).where(direct_uploads.c.id == upload_id, direct_uploads.c.uploader_id == user_id)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return row
+
+def _spool_to_disk(source) -> str:
+    """Copy the upload to a temp file in UPLOAD_CHUNK_BYTES pieces, enforcing UPLOAD_MAX_BYTES"""
+    fd, path = tempfile.mkstemp(prefix="upload-")
+    try:
+        with os.fdopen(fd, "wb") as target:
+            copied = 0
+            while chunk := source.read(settings.UPLOAD_CHUNK_BYTES):
+                copied += len(chunk)
+                if copied > settings.UPLOAD_MAX_BYTES:
+                    raise UploadTooLarge()
+                target.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+@router.post("/image", dependencies=[Depends(check_content_length)])
 async def upload_image(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """
+    Store an image as metadata-free full, medium and thumb variants.
+    `url` is the full variant; the others follow the same path (see app.core.images.variant_url).
+    A near-duplicate of one of the user's earlier uploads returns that upload instead.
+    Two identical uploads in flight at once can both miss and both be stored; that
+    costs a little storage, so they aren't serialized.
+    """
+    # Authentication may have checked out a connection; don't hold it while processing
+    await db.close()
+
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
-    
-    # Generate unique filename
-    ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-    filename = f"{uuid.uuid4()}.{ext}"
-
-    # Supabase Storage REST upload (service role key)
-    upload_url = f"{settings.SUPABASE_URL}/storage/v1/object/lost_items/{filename}"
-    contents = await file.read()
-    headers = {
-        "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}",
-        "Content-Type": file.content_type,
-        "x-upsert": "true",
+    if file.size is not None and file.size > settings.UPLOAD_MAX_BYTES:
+        raise _too_large()
+    if upload_slots.locked():
+        raise HTTPException(status_code=503, detail="Server is busy, please retry shortly", headers={"Retry-After": "1"})
+
+    async with upload_slots:
+        try:
+            source_path = await run_in_threadpool(_spool_to_disk, file.file)
+        except UploadTooLarge:
+            raise _too_large()
+        try:
+            variants, phash = await image_pool.run_async(
+                process_image, source_path, settings.IMAGE_FORMAT, settings.IMAGE_QUALITY, settings.IMAGE_MAX_PIXELS
+            )
+        except HTTPException:
+            raise
+        except Exception:
+            raise HTTPException(status_code=400, detail="Could not read image")
+        finally:
+            os.unlink(source_path)
+
+        # Short-lived sessions, so no connection is held across processing or storage calls
+        if settings.IMAGE_DEDUP_ENABLED:
+            async with db_session.AsyncSessionLocal() as lookup_db:
+                existing = await find_duplicate(lookup_db, current_user.id, phash)
+            if existing is not None:
+                return {"url": existing, "variants": variant_urls(existing), "duplicate": True}
+
+        # Unique folder per image
+        urls = await store_variants(uuid.uuid4(), variants)
+
+    async with db_session.AsyncSessionLocal() as write_db:
+        await record_hash(write_db, current_user.id, phash, urls[DEFAULT_VARIANT])
+        await write_db.commit()
+    return {"url": urls[DEFAULT_VARIANT], "variants": urls, "duplicate": False}
+
+@router.post("/presign")
+async def presign_upload(
+    body: PresignRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Signed URL for uploading an image straight to storage. Send the file as
+    described by `upload`, then call /upload/{upload_id}/complete.
+    """
+    if not body.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    upload_id = uuid.uuid4()
+    storage = get_storage()
+    upload = await storage.create_upload_url(
+        settings.UPLOAD_ORIGINALS_BUCKET, original_path(upload_id), body.content_type, settings.UPLOAD_MAX_BYTES
+    )
+    await db.execute(direct_uploads.insert().values(
+        id=upload_id, uploader_id=current_user.id, content_type=body.content_type
+    ))
+    await db.commit()
+    return {
+        "upload_id": upload_id,
+        "upload": upload,
+        "max_bytes": settings.UPLOAD_MAX_BYTES,
+        "expires_in": storage.upload_url_lifetime,
     }
-    try:
-        resp = requests.post(upload_url, headers=headers, data=contents, timeout=30)
-        if resp.status_code not in (200, 201):
-            raise HTTPException(status_code=500, detail=f"Upload failed: {resp.status_code} {resp.text}")
-        # Public URL (bucket must allow public read)
-        public_url = f"{settings.SUPABASE_URL}/storage/v1/object/public/lost_items/{filename}"
-        return {"url": public_url}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@router.post("/{upload_id}/complete", status_code=202)
+async def complete_upload(
+    upload_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Queue an uploaded file for processing; poll GET /upload/{upload_id} for its URLs"""
+    row = await _get_upload(db, upload_id, current_user.id)
+    if row.status != "pending":
+        return _upload_status(row)
+
+    storage = get_storage()
+    if datetime.now(timezone.utc) - row.created_at > timedelta(seconds=storage.upload_url_lifetime):
+        raise HTTPException(status_code=410, detail="Upload URL has expired; request a new one")
+    size = await storage.size(settings.UPLOAD_ORIGINALS_BUCKET, original_path(upload_id))
+    if size is None:
+        raise HTTPException(status_code=400, detail="File has not been uploaded")
+    status = "uploaded"
+    if size > settings.UPLOAD_MAX_BYTES:
+        await storage.delete(settings.UPLOAD_ORIGINALS_BUCKET, original_path(upload_id))
+        status = "failed"
+
+    row = (await db.execute(
+        update(direct_uploads)
+        .where(direct_uploads.c.id == upload_id, direct_uploads.c.status == "pending")
+        .values(status=status, last_error=None if status == "uploaded" else "too large", updated_at=func.now())
+        .returning(*direct_uploads.c)
+    )).first() or await _get_upload(db, upload_id, current_user.id)
+    await db.commit()
+    if status == "failed":
+        raise _too_large()
+    return _upload_status(row)
+
+@router.get("/{upload_id}")
+async def get_upload(
+    upload_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Processing status; `url` and `variants` are set once status is ready or duplicate"""
+    return _upload_status(await _get_upload(db, upload_id, current_user.id))
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from app.db.session import get_db
+from app.db.session import get_async_db
+from app.db.routing import get_async_read_db
 from app.core.security import get_current_user
+from app.core.images import variant_url
 from app.models.user import User, Profile
 
 router = APIRouter()
@@ -20,9 +23,9 @@ class UserResponse(BaseModel):
 @router.get("/me", response_model=UserResponse)
 async def get_me(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    profile = await db.get(Profile, current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
@@ -34,7 +37,7 @@ async def get_me(
         roll_no=profile.roll_no,
         dept_id=profile.dept_id,
         section_id=profile.section_id,
-        avatar_url=profile.avatar_url
+        avatar_url=variant_url(profile.avatar_url, "thumb")
     )
 
 class UpdateProfileRequest(BaseModel):
@@ -57,20 +60,22 @@ class ProfileResponse(BaseModel):
 @router.get("/profile", response_model=ProfileResponse)
 async def get_profile(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    profile = await db.get(Profile, current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
-    return profile
+    response = ProfileResponse.model_validate(profile, from_attributes=True)
+    response.avatar_url = variant_url(profile.avatar_url, "thumb")
+    return response
 
 @router.patch("/profile")
 async def update_profile(
     request: UpdateProfileRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+    profile = await db.get(Profile, current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
@@ -89,8 +94,8 @@ async def update_profile(
     if request.avatar_url is not None:
         profile.avatar_url = request.avatar_url
     
-    db.commit()
-    db.refresh(profile)
+    await db.commit()
+    await db.refresh(profile)
     
     return {"message": "Profile updated successfully"}
 
@@ -104,7 +109,7 @@ class DepartmentResponse(BaseModel):
     code: str
 
 @router.get("/departments", response_model=_List[DepartmentResponse])
-async def list_departments(db: Session = Depends(get_db)):
-    depts = db.query(Department).order_by(Department.name.asc()).all()
+async def list_departments(db: AsyncSession = Depends(get_async_read_db)):
+    depts = (await db.scalars(select(Department).order_by(Department.name.asc()))).all()
     return [{"id": d.id, "name": d.name, "code": d.code} for d in depts]
 
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "CampusConnect API"
@@ -9,19 +9,138 @@ class Settings(BaseSettings):
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
     
     # Supabase
-    SUPABASE_URL: str
-    SUPABASE_SERVICE_ROLE_KEY: str
+    SUPABASE_URL: str = ""
+    SUPABASE_SERVICE_ROLE_KEY: str = ""
+
+    # Where uploads are stored: Supabase Storage, or files under LOCAL_STORAGE_ROOT
+    # served by the API at LOCAL_STORAGE_PUBLIC_URL (default: {API_V1_STR}/storage).
+    # LOCAL_STORAGE_ACCEL_REDIRECT hands serving to an nginx internal location.
+    # Workers read local objects from LOCAL_STORAGE_ROOT, so run them on the same host.
+    STORAGE_BACKEND: Literal["supabase", "local"] = "supabase"
+    LOCAL_STORAGE_ROOT: str = "./storage"
+    LOCAL_STORAGE_PUBLIC_URL: str = ""
+    LOCAL_STORAGE_ACCEL_REDIRECT: str = ""
     
     # Auth
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
-    
+
+    # Authenticated-user cache (per process, 0 disables)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    # How long a worker may accept a revoked token's role/verified claims
+    TOKEN_VERSION_CACHE_TTL_SECONDS: int = 60
+
+    # Password hashing process pool (0 workers = one per CPU core).
+    # Keep MAX_PENDING below the threadpool size (40) so hashing can't starve it.
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_PENDING: int = 16
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 10.0
+
+    # Calendar feeds: token lifetime, how far back RSVPed events are included,
+    # and the rendered-feed cache (entries are keyed by content, so TTL only bounds memory)
+    CALENDAR_FEED_TOKEN_EXPIRE_DAYS: int = 365
+    CALENDAR_FEED_PAST_DAYS: int = 90
+    CALENDAR_CACHE_MAX_SIZE: int = 2000
+    CALENDAR_CACHE_TTL_SECONDS: int = 3600
+
+    # Upcoming-event tag counts behind /events/tags (per process, cleared on event writes)
+    EVENT_TAGS_CACHE_TTL_SECONDS: int = 300
+
+    # Event reminders: minutes-before-start windows, and the in-process scheduler
+    # (safe to run in every worker; run `python -m app.jobs.reminders` instead if disabled)
+    REMINDER_WINDOWS_MINUTES: List[int] = [1440, 60]
+    REMINDER_INTERVAL_SECONDS: int = 60
+    REMINDER_SCHEDULER_ENABLED: bool = True
+
+    # Item embedding worker (python -m app.jobs.embeddings); CLIP, 512 dimensions
+    EMBEDDING_MODEL_NAME: str = "clip-ViT-B-32"
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_POLL_SECONDS: int = 5
+    EMBEDDING_MAX_ATTEMPTS: int = 3
+    EMBEDDING_RETRY_SECONDS: int = 300  # wait before retrying an image that failed to load
+    EMBEDDING_LEASE_SECONDS: int = 600  # a claimed batch is retried by another worker after this
+    EMBEDDING_TORCH_THREADS: int = 0  # 0 = torch default (all cores)
+    EMBEDDING_DOWNLOAD_CONCURRENCY: int = 8
+    EMBEDDING_DOWNLOAD_TIMEOUT_SECONDS: float = 10.0
+    EMBEDDING_MAX_IMAGE_BYTES: int = 10 * 1024 * 1024
+    # Encoding uploaded query images (/items/search/by-image); the model is loaded
+    # in these workers at startup unless EMBEDDING_QUERY_WARM_UP is off
+    EMBEDDING_QUERY_WORKERS: int = 1
+    EMBEDDING_QUERY_MAX_PENDING: int = 8
+    EMBEDDING_QUERY_TIMEOUT_SECONDS: float = 60.0
+    EMBEDDING_QUERY_WARM_UP: bool = True
+
+    # Item text search: how close (0-1 word similarity) a misspelt word must be to match
+    ITEM_SEARCH_SIMILARITY_THRESHOLD: float = 0.5
+
+    # Similar-item search: default ivfflat probes (of 100 lists) and the
+    # reload interval of the NumPy fallback used without pgvector
+    VECTOR_SEARCH_PROBES: int = 10
+    VECTOR_FALLBACK_REFRESH_SECONDS: int = 60
+
+    # Lost/found matcher (python -m app.jobs.matching)
+    MATCH_WINDOW_DAYS: int = 14  # candidates posted within this many days of the new item
+    MATCH_MIN_SCORE: float = 0.75
+    MATCH_MAX_PER_ITEM: int = 5
+    MATCH_BATCH_SIZE: int = 100
+    MATCH_POLL_SECONDS: int = 60
+
+    # Image upload proxy: size cap (enforced while streaming), in-flight uploads
+    # per process (also the storage connection pool size), and chunk size
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    UPLOAD_MAX_CONCURRENCY: int = 32
+    UPLOAD_CHUNK_BYTES: int = 64 * 1024
+    STORAGE_HTTP_TIMEOUT_SECONDS: float = 30.0
+
+    # Uploaded images are re-encoded as full/medium/thumb variants ("webp" or "jpeg")
+    IMAGE_FORMAT: Literal["webp", "jpeg"] = "webp"
+    IMAGE_QUALITY: int = 80
+    IMAGE_MAX_PIXELS: int = 40_000_000  # decompression-bomb guard
+    IMAGE_PROCESSING_WORKERS: int = 2
+    IMAGE_PROCESSING_MAX_PENDING: int = 16
+    IMAGE_PROCESSING_TIMEOUT_SECONDS: float = 30.0
+    # Re-uploads within this many differing bits of a user's earlier image reuse it.
+    # Lookups are exact up to 3 (four 16-bit hash bands); higher values can miss.
+    IMAGE_DEDUP_ENABLED: bool = True
+    IMAGE_DEDUP_MAX_DISTANCE: int = 3
+
+    # Direct uploads: clients PUT the original to a signed URL in this private
+    # bucket, then call /upload/{id}/complete; python -m app.jobs.uploads makes
+    # the variants. UPLOAD_URL_EXPIRE_SECONDS applies to the local backend;
+    # Supabase signed upload URLs are always valid for 2 hours. /complete is
+    # refused once the backend's URL lifetime has passed.
+    UPLOAD_ORIGINALS_BUCKET: str = "upload_originals"
+    UPLOAD_URL_EXPIRE_SECONDS: int = 15 * 60
+    UPLOAD_PROCESSING_BATCH_SIZE: int = 8
+    UPLOAD_PROCESSING_MAX_ATTEMPTS: int = 3
+    UPLOAD_PROCESSING_RETRY_SECONDS: int = 60
+    UPLOAD_PROCESSING_POLL_SECONDS: float = 2.0
+    UPLOAD_ABANDONED_HOURS: int = 24  # never-completed uploads are removed after this
+
     # Faculty domain (optional)
     FACULTY_EMAIL_DOMAIN: str = ""
     
     # Database
     DATABASE_URL: str  # postgres connection string from Supabase
+
+    # Read replica (optional) for safe GET routes
+    DATABASE_REPLICA_URL: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_HEALTH_CHECK_SECONDS: float = 5.0
+    # After a write, that user's reads stay on the primary for this long
+    READ_YOUR_WRITES_SECONDS: int = 10
+
+    # Flag a request as a likely N+1 when one statement shape repeats this often (0 disables)
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10
+
+    # Connection pool (applies to the sync and async engines separately)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 disables
+    DB_POOL_PRE_PING: bool = True  # one extra round trip per checkout
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,9 @@
+"""Password hashing primitives, kept import-light so pool workers start fast"""
+from passlib.hash import pbkdf2_sha256
+
+# Use PBKDF2-SHA256 to avoid bcrypt 72-byte limit and binary deps
+def hash_password(password: str) -> str:
+    return pbkdf2_sha256.hash(password)
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pbkdf2_sha256.verify(plain_password, hashed_password)
@@ -0,0 +1,30 @@
+"""
+Shared async HTTP client for outbound storage calls.
+
+One pooled httpx.AsyncClient per process keeps connections to Supabase alive
+between requests instead of paying a TCP/TLS handshake per upload.
+"""
+from typing import Optional
+import httpx
+from app.core.config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_storage_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.STORAGE_HTTP_TIMEOUT_SECONDS, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=settings.UPLOAD_MAX_CONCURRENCY,
+                max_keepalive_connections=settings.UPLOAD_MAX_CONCURRENCY
+            ),
+        )
+    return _client
+
+async def close_storage_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
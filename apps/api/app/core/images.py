@@ -0,0 +1,86 @@
+"""
+Image variants for uploads.
+
+process_image runs in a process pool: it applies the EXIF orientation, drops
+all metadata (EXIF incl. GPS, XMP, ICC), and encodes full, medium and thumb
+variants capped at VARIANT_SIZES, plus a perceptual hash used to spot
+re-uploads. Variants are stored side by side as <id>/<variant>.<ext>, so
+variant_url can derive one URL from another.
+"""
+import io
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Longest side in pixels, largest first (each variant is resized from the previous one)
+VARIANT_SIZES = {"full": 2048, "medium": 1024, "thumb": 320}
+DEFAULT_VARIANT = "full"
+
+HASH_SIZE = 8  # 8x8 gradient bits = 64-bit hash
+HASH_BANDS = 4
+
+_FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+_VARIANT_PATH = re.compile(r"/(?P<id>[0-9a-f-]{36})/(?P<variant>" + "|".join(VARIANT_SIZES) + r")\.(?P<ext>webp|jpg)$")
+
+
+def extension(fmt: str) -> str:
+    return "jpg" if fmt == "jpeg" else fmt
+
+def dhash(image) -> int:
+    """64-bit difference hash: survives re-encoding, resizing and small edits"""
+    from PIL import Image
+    small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            right = pixels[row * (HASH_SIZE + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+def hash_bands(value: int) -> List[int]:
+    """Four 16-bit slices; hashes within Hamming distance 3 share at least one"""
+    return [(value >> (16 * i)) & 0xFFFF for i in range(HASH_BANDS)]
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count("1")
+
+def to_signed64(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def process_image(path: str, fmt: str, quality: int, max_pixels: int) -> Tuple[Dict[str, Tuple[bytes, str]], int]:
+    """
+    ({variant: (encoded bytes, content type)}, perceptual hash); raises on
+    unreadable or oversized images
+    """
+    from PIL import Image, ImageOps
+    Image.MAX_IMAGE_PIXELS = max_pixels  # larger images raise DecompressionBombError
+    pil_format, content_type = _FORMATS[fmt]
+
+    with Image.open(path) as source:
+        largest = VARIANT_SIZES[DEFAULT_VARIANT]
+        source.draft("RGB", (largest, largest))  # JPEG: decode at reduced scale when it's much larger
+        image = ImageOps.exif_transpose(source)
+    keep_alpha = fmt == "webp" and image.mode in ("RGBA", "LA", "P")
+    image = image.convert("RGBA" if keep_alpha else "RGB")
+    image.info = {}
+    phash = dhash(image)
+
+    variants = {}
+    for name, max_side in VARIANT_SIZES.items():
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        # Nothing but pixels is written: no exif/icc_profile/xmp passed to save
+        options = {"optimize": True} if pil_format == "JPEG" else {"method": 4}
+        image.save(buffer, format=pil_format, quality=quality, **options)
+        variants[name] = (buffer.getvalue(), content_type)
+    return variants, phash
+
+def variant_url(url: Optional[str], variant: str) -> Optional[str]:
+    """The same image at another size; URLs from before variants existed are returned as-is"""
+    if not url:
+        return url
+    match = _VARIANT_PATH.search(url)
+    if match is None:
+        return url
+    return url[:match.start()] + f"/{match['id']}/{variant}.{match['ext']}"
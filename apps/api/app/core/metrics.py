@@ -0,0 +1,199 @@
+"""
+Minimal in-process metrics in the Prometheus text exposition format.
+
+Recording is a dict lookup plus a bisect under a per-metric lock, cheap
+enough for the request hot path. Values are per worker process; scrape each
+worker or run a single worker when measuring.
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from fastapi import Request
+
+_registry: list = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], le: Optional[str] = None) -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, function: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def collect(self) -> list:
+        if self._function is not None:
+            return self.header() + [f"{self.name} {self._function()}"]
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> list:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = self.header()
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+def _threadpool_tokens(attribute: str) -> float:
+    # The default anyio limiter is what runs sync endpoints and dependencies
+    from anyio import to_thread
+    try:
+        return float(getattr(to_thread.current_default_thread_limiter(), attribute))
+    except RuntimeError:  # no running event loop
+        return 0.0
+
+
+REQUEST_DURATION = Histogram(
+    "campusconnect_http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "campusconnect_http_requests_in_progress",
+    "Requests currently being handled",
+    ("method",),
+)
+DB_QUERY_DURATION = Histogram(
+    "campusconnect_db_query_duration_seconds",
+    "Total database time spent per request, by route template",
+    ("route",),
+)
+DB_STATEMENTS = Counter(
+    "campusconnect_db_statements_total",
+    "SQL statements executed, by route template",
+    ("route",),
+)
+THREADPOOL_IN_USE = Gauge(
+    "campusconnect_threadpool_threads_in_use",
+    "Threadpool tokens borrowed by sync endpoints and dependencies",
+    function=lambda: _threadpool_tokens("borrowed_tokens"),
+)
+THREADPOOL_SIZE = Gauge(
+    "campusconnect_threadpool_threads_total",
+    "Threadpool capacity",
+    function=lambda: _threadpool_tokens("total_tokens"),
+)
+STORAGE_REQUEST_DURATION = Histogram(
+    "campusconnect_storage_request_duration_seconds",
+    "Outbound Supabase Storage call latency",
+    ("operation", "status"),
+)
+
+
+def _route_template(request: Request) -> str:
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+async def metrics_middleware(request: Request, call_next):
+    method = request.method
+    REQUESTS_IN_PROGRESS.inc(method=method)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_PROGRESS.dec(method=method)
+        route = _route_template(request)
+        REQUEST_DURATION.observe(time.perf_counter() - start, method=method, route=route, status=status)
+        stats = getattr(request.state, "query_stats", None)
+        if stats is not None:
+            DB_QUERY_DURATION.observe(stats.total_seconds, route=route)
+            DB_STATEMENTS.inc(stats.count, route=route)
@@ -0,0 +1,57 @@
+"""
+Keyset (cursor) pagination.
+
+A cursor is the sort key of the last row on a page, e.g. (created_at, id),
+encoded as opaque URL-safe base64. The next page is `WHERE (created_at, id) <
+(:created_at, :id)`, which a composite index on the same columns answers
+without walking the skipped rows, and which doesn't shift when rows are
+inserted ahead of it.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from uuid import UUID
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+_DECODERS = {datetime: datetime.fromisoformat, UUID: UUID, int: int, str: str}
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else str(v) if isinstance(v, UUID) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> Tuple[Any, ...]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(payload) != len(types):
+            raise ValueError("wrong number of cursor fields")
+        return tuple(_DECODERS[t](v) for t, v in zip(types, payload))
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(query, columns: Sequence, types: Sequence[type], limit: int,
+             cursor: Optional[str] = None, offset: int = 0, descending: bool = False):
+    """
+    Order `query` by `columns` and start after `cursor`, or skip `offset` rows
+    when no cursor is given (kept for older clients). Fetches one extra row so
+    `next_cursor` knows whether another page exists.
+    """
+    if cursor:
+        key = tuple_(*columns)
+        after = tuple_(*decode_cursor(cursor, types))
+        query = query.where(key < after if descending else key > after)
+    elif offset:
+        query = query.offset(offset)
+    order = [c.desc() if descending else c.asc() for c in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+def next_cursor(rows: List, limit: int, key: Callable[[Any], Sequence[Any]]) -> Tuple[List, Optional[str]]:
+    """Trim the extra row fetched by paginate; returns (page, cursor or None)"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(key(page[-1]))
@@ -1,13 +1,12 @@
 from fastapi import HTTPException, status, Depends
-from app.core.security import get_current_user
-from app.models.user import User
+from app.core.security import get_current_principal, Principal
 
 def require_role(*allowed_roles: str):
     """
     Dependency to check if user has required role
-    Usage: current_user: User = Depends(require_role("admin", "faculty"))
+    Usage: current_user: Principal = Depends(require_role("admin", "faculty"))
     """
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    def role_checker(current_user: Principal = Depends(get_current_principal)) -> Principal:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -16,7 +15,7 @@ def require_role(*allowed_roles: str):
         return current_user
     return role_checker
 
-def require_verified(current_user: User = Depends(get_current_user)) -> User:
+def require_verified(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """Dependency to check if user is verified"""
     if not current_user.verified:
         raise HTTPException(
@@ -25,7 +24,7 @@ def require_verified(current_user: User = Depends(get_current_user)) -> User:
         )
     return current_user
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+def require_admin(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """Shortcut for admin-only access"""
     if current_user.role != "admin":
         raise HTTPException(
@@ -34,7 +33,7 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
         )
     return current_user
 
-def require_faculty_or_admin(current_user: User = Depends(get_current_user)) -> User:
+def require_faculty_or_admin(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """Shortcut for faculty or admin access"""
     if current_user.role not in ("faculty", "admin"):
         raise HTTPException(
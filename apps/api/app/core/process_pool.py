@@ -0,0 +1,98 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+
+
+class BoundedProcessPool:
+    """
+    Process pool for CPU-heavy work called from request handlers.
+    At most `max_pending` calls may be running or queued; beyond that callers
+    get an immediate 503 instead of tying up a threadpool slot while they wait.
+    A call that outlives `timeout` gets a 504.
+    """
+
+    def __init__(self, name: str, max_workers: Optional[int], max_pending: int, timeout: float):
+        self.name = name
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use so each server worker owns its pool; spawn keeps
+        # the children free of inherited DB connections.
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._executor
+
+    def _busy(self) -> HTTPException:
+        self.rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+    def _timed_out(self) -> HTTPException:
+        self.timed_out += 1
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Processing took too long, please try again",
+        )
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        """
+        Take a slot and submit. The slot is released when the task finishes, not
+        when the caller stops waiting: a running task can't be cancelled, and it
+        still occupies a worker until it returns.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise self._busy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn: Callable, *args):
+        """Run `fn(*args)` in the pool, blocking the calling thread for the result"""
+        future = self._submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise self._timed_out()
+
+    async def run_async(self, fn: Callable, *args):
+        """Like run, but awaits the result instead of holding a thread"""
+        future = self._submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out()
+
+    def warm(self, fn: Callable) -> None:
+        """Start the workers and run `fn` (e.g. a model load) on them without waiting"""
+        executor = self._get_executor()
+        for _ in range(self.max_workers):
+            executor.submit(fn)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -1,25 +1,61 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
+from uuid import UUID
 from jose import jwt, JWTError
-from passlib.hash import pbkdf2_sha256
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core import hashing
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.process_pool import BoundedProcessPool
+from app.db.session import get_async_db
 from app.models.user import User
+from app.models.token_version import token_versions
+from app.models.calendar_token_version import calendar_token_versions
 
-# Use PBKDF2-SHA256 to avoid bcrypt 72-byte limit and binary deps
 security = HTTPBearer()
 
+# Hashing runs in its own processes so a login storm can't starve the threadpool
+password_pool = BoundedProcessPool(
+    name="password-hashing",
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    timeout=settings.PASSWORD_HASH_TIMEOUT_SECONDS
+)
+
+# Detached User rows keyed by user id, so protected routes skip the lookup query.
+# Per process: other workers pick up role/verified changes once the TTL expires.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+token_version_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.TOKEN_VERSION_CACHE_TTL_SECONDS)
+
+@dataclass(frozen=True)
+class Principal:
+    """Caller identity and authorization claims taken from a verified access token"""
+    id: UUID
+    role: str
+    verified: bool
+
 def hash_password(password: str) -> str:
-    return pbkdf2_sha256.hash(password)
+    return password_pool.run(hashing.hash_password, password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pbkdf2_sha256.verify(plain_password, hashed_password)
+    return password_pool.run(hashing.verify_password, plain_password, hashed_password)
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(
+    data: dict,
+    expires_delta: Optional[timedelta] = None,
+    user: Optional[User] = None,
+    token_version: int = 0
+) -> str:
     to_encode = data.copy()
+    if user is not None:
+        # Authorization claims, valid until the user's token version is bumped
+        to_encode.update({"role": user.role, "verified": bool(user.verified), "ver": token_version})
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -28,19 +64,127 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
+def _token_version_query(user_id: str):
+    return select(token_versions.c.version).where(token_versions.c.user_id == user_id)
+
+def get_token_version(db: Session, user_id: str) -> int:
+    version = token_version_cache.get(user_id)
+    if version is None:
+        version = db.execute(_token_version_query(user_id)).scalar() or 0
+        token_version_cache.set(user_id, version)
+    return version
+
+async def get_token_version_async(db: AsyncSession, user_id: str) -> int:
+    version = token_version_cache.get(user_id)
+    if version is None:
+        version = (await db.execute(_token_version_query(user_id))).scalar() or 0
+        token_version_cache.set(user_id, version)
+    return version
+
+def bump_token_version(db: Session, user_id) -> int:
+    """Revoke the user's outstanding tokens; the caller commits and then calls invalidate_user"""
+    stmt = pg_insert(token_versions).values(user_id=user_id, version=1).on_conflict_do_update(
+        index_elements=[token_versions.c.user_id],
+        set_={"version": token_versions.c.version + 1}
+    ).returning(token_versions.c.version)
+    return db.execute(stmt).scalar_one()
+
+def invalidate_user(user_id: str) -> None:
+    user_cache.invalidate(user_id)
+    token_version_cache.invalidate(user_id)
+
 def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        return payload
     except JWTError:
+        payload = None
+    # Scoped tokens (e.g. calendar feeds) are not API credentials
+    if payload is None or "scope" in payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
+    return payload
+
+def token_subject(token: str) -> Optional[str]:
+    """User id from a token, or None if it doesn't verify"""
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+    return None if "scope" in payload else payload.get("sub")
+
+def create_calendar_token(user_id, version: int = 0) -> str:
+    """
+    Long-lived token for a user's calendar feed URL; grants nothing else.
+    Revoked when the user rotates their feed URL (bump_calendar_token_version).
+    """
+    expire = datetime.utcnow() + timedelta(days=settings.CALENDAR_FEED_TOKEN_EXPIRE_DAYS)
+    return jwt.encode(
+        {"sub": str(user_id), "scope": "calendar", "ver": version, "exp": expire},
+        settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
+    )
+
+async def get_calendar_token_version(db: AsyncSession, user_id) -> int:
+    return (await db.execute(
+        select(calendar_token_versions.c.version).where(calendar_token_versions.c.user_id == user_id)
+    )).scalar() or 0
+
+async def bump_calendar_token_version(db: AsyncSession, user_id) -> int:
+    """Revoke the user's calendar feed tokens; the caller commits"""
+    stmt = pg_insert(calendar_token_versions).values(user_id=user_id, version=1).on_conflict_do_update(
+        index_elements=[calendar_token_versions.c.user_id],
+        set_={"version": calendar_token_versions.c.version + 1}
+    ).returning(calendar_token_versions.c.version)
+    return (await db.execute(stmt)).scalar_one()
+
+async def calendar_token_subject(db: AsyncSession, token: str) -> Optional[str]:
+    """User id from a calendar token, or None if it doesn't verify or was revoked"""
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+    user_id = payload.get("sub")
+    if payload.get("scope") != "calendar" or user_id is None:
+        return None
+    if payload.get("ver", 0) != await get_calendar_token_version(db, user_id):
+        return None
+    return user_id
+
+def create_write_marker(user_id) -> str:
+    """Proof that user_id wrote within READ_YOUR_WRITES_SECONDS; grants nothing else"""
+    expire = datetime.utcnow() + timedelta(seconds=settings.READ_YOUR_WRITES_SECONDS)
+    return jwt.encode(
+        {"sub": str(user_id), "scope": "write-marker", "exp": expire},
+        settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
+    )
+
+def write_marker_subject(token: str) -> Optional[str]:
+    """User id from an unexpired write marker, or None"""
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub") if payload.get("scope") == "write-marker" else None
+
+def create_upload_token(bucket: str, path: str, content_type: str, max_bytes: int) -> str:
+    """Short-lived permission to PUT one object to local storage; grants nothing else"""
+    expire = datetime.utcnow() + timedelta(seconds=settings.UPLOAD_URL_EXPIRE_SECONDS)
+    return jwt.encode(
+        {"scope": "upload", "bucket": bucket, "path": path, "ct": content_type, "max": max_bytes, "exp": expire},
+        settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
+    )
+
+def upload_token_claims(token: str) -> Optional[dict]:
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+    return payload if payload.get("scope") == "upload" else None
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     token = credentials.credentials
     payload = decode_token(token)
@@ -50,11 +194,38 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_cache.get(user_id)
     if user is None:
+        user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
+        # Detach so a commit in this request can't expire the shared instance
+        db.expunge(user)
+        user_cache.set(user_id, user)
+    return user
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Authorize from the token's claims instead of loading the user row"""
+    payload = decode_token(credentials.credentials)
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    if "role" not in payload or "ver" not in payload:
+        # Token issued before claims were embedded
+        user = await get_current_user(credentials, db)
+        return Principal(id=user.id, role=user.role, verified=bool(user.verified))
+    if payload["ver"] != await get_token_version_async(db, user_id):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
+            detail="Token has been revoked. Please log in again.",
         )
-    return user
-
+    return Principal(id=UUID(user_id), role=payload["role"], verified=bool(payload.get("verified")))
@@ -0,0 +1,85 @@
+import bisect
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+
+class PoolMetrics:
+    """Checkout-wait histogram and timeout counter for one connection pool"""
+
+    # Upper bounds in seconds; waits above the last bucket land in "+Inf"
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.BUCKETS) + 1)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(self.BUCKETS, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def record_timeout(self, seconds: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, histogram = 0, {}
+            for bound, count in zip(self.BUCKETS + ("+Inf",), self._counts):
+                cumulative += count
+                histogram[str(bound)] = cumulative
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_histogram": histogram,
+            }
+
+
+def instrumented_pool(pool_class: type, metrics: PoolMetrics) -> type:
+    """
+    Subclass `pool_class` so every checkout's wait time is recorded in `metrics`.
+    Metrics live on the class so they survive Pool.recreate() on dispose.
+    """
+    class InstrumentedPool(pool_class):
+        pool_metrics = metrics
+
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                self.pool_metrics.record_timeout(time.perf_counter() - start)
+                raise
+            self.pool_metrics.observe(time.perf_counter() - start)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
+
+
+def pool_status(pool: Pool) -> dict:
+    status = {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "timeout_seconds": pool.timeout(),
+    }
+    metrics = getattr(pool, "pool_metrics", None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
@@ -0,0 +1,115 @@
+"""
+Per-request SQL statement counting and N+1 detection.
+
+A SQLAlchemy engine hook records every statement executed while a QueryStats
+is active in the current context. The middleware activates one per request;
+tests can do the same with `track_queries()`:
+
+    with track_queries() as stats:
+        client.get("/api/v1/events")
+    assert_no_n_plus_one(stats)
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+# Expanded IN lists and runs of whitespace vary between otherwise identical statements
+_IN_LIST = re.compile(r"\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    return _WHITESPACE.sub(" ", _IN_LIST.sub("(?)", statement)).strip()
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_seconds * 1000
+
+    def n_plus_one_suspects(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Statement shapes executed at least `threshold` times, most frequent first"""
+        if threshold is None:
+            threshold = settings.SQL_N_PLUS_ONE_THRESHOLD
+        if threshold <= 0:
+            return []
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = conn.info.get("query_started_at")
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+
+@contextmanager
+def track_queries():
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def assert_no_n_plus_one(stats: QueryStats, threshold: Optional[int] = None) -> None:
+    suspects = stats.n_plus_one_suspects(threshold)
+    if suspects:
+        details = "\n".join(f"{n}x {shape}" for shape, n in suspects)
+        raise AssertionError(f"Likely N+1 query pattern:\n{details}")
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """Report statement count and DB time via Server-Timing and a log line"""
+    with track_queries() as stats:
+        request.state.query_stats = stats
+        response = await call_next(request)
+
+    response.headers["Server-Timing"] = f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"'
+    suspects = stats.n_plus_one_suspects()
+    logger.info(json.dumps({
+        "event": "sql_stats",
+        "method": request.method,
+        "path": request.url.path,
+        "status": response.status_code,
+        "statements": stats.count,
+        "db_ms": round(stats.total_ms, 2),
+        "n_plus_one": [{"statement": shape[:200], "count": n} for shape, n in suspects],
+    }))
+    if suspects:
+        logger.warning(
+            "Likely N+1 on %s %s: %d executions of %s",
+            request.method, request.url.path, suspects[0][1], suspects[0][0][:200]
+        )
+    return response
@@ -0,0 +1,161 @@
+"""
+Read-replica routing for safe GET routes.
+
+Reads go to DATABASE_REPLICA_URL when it is configured, reachable and within
+REPLICA_MAX_LAG_SECONDS of the primary; otherwise they fall back to the primary.
+A user who just wrote is pinned to the primary for READ_YOUR_WRITES_SECONDS so
+they always see their own changes, whichever worker serves the next request:
+the write marker (a short-lived signed token) travels with the client, as the
+last_write cookie and the X-Last-Write response header. Browsers send the
+cookie on same-site requests; other clients, and cross-origin fetches (which
+don't send cookies here), echo the header back on their reads.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import text
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import token_subject, create_write_marker, write_marker_subject
+from app.db import session as db_session
+
+logger = logging.getLogger(__name__)
+
+# NULL when the server isn't in recovery; zero when replay has caught up with
+# everything received, so an idle primary doesn't look like lag.
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+# Transaction-local, so the pooled connection keeps its normal timeout afterwards
+STATEMENT_TIMEOUT_SQL = text("SELECT set_config('statement_timeout', :ms, true)")
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+WRITE_MARKER_COOKIE = "last_write"
+WRITE_MARKER_HEADER = "X-Last-Write"
+
+# Also kept per process, for clients that drop both the cookie and the header
+recent_writers = TTLCache(maxsize=100000, ttl=settings.READ_YOUR_WRITES_SECONDS)
+
+
+class ReplicaMonitor:
+    """Caches the replica's health so at most one lag check runs per interval"""
+
+    def __init__(self):
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.checked_at = 0.0
+        self.last_error: Optional[str] = None
+
+    def due(self) -> bool:
+        return time.monotonic() - self.checked_at >= settings.REPLICA_HEALTH_CHECK_SECONDS
+
+    def record(self, lag: Optional[float], error: Optional[str] = None) -> None:
+        self.lag_seconds = float(lag) if lag is not None else None
+        self.last_error = error
+        healthy = error is None and self.lag_seconds is not None and self.lag_seconds <= settings.REPLICA_MAX_LAG_SECONDS
+        if healthy != self.healthy:
+            logger.warning("Read replica %s (lag=%s, error=%s)", "healthy" if healthy else "unhealthy", lag, error)
+        self.healthy = healthy
+
+    def check(self) -> bool:
+        # checked_at is set first, so other requests use the cached result
+        # instead of queuing behind a check that's in flight
+        if self.due():
+            self.checked_at = time.monotonic()
+            try:
+                with db_session.replica_engine.connect() as conn:
+                    # Bounded like check_async: connect_timeout on the engine, this for the query
+                    conn.execute(STATEMENT_TIMEOUT_SQL, {"ms": str(int(settings.REPLICA_HEALTH_CHECK_SECONDS * 1000))})
+                    self.record(conn.scalar(LAG_SQL))
+            except Exception as e:
+                self.record(None, str(e))
+        return self.healthy
+
+    async def check_async(self) -> bool:
+        if self.due():
+            self.checked_at = time.monotonic()
+            try:
+                async with db_session.async_replica_engine.connect() as conn:
+                    lag = await asyncio.wait_for(conn.scalar(LAG_SQL), timeout=settings.REPLICA_HEALTH_CHECK_SECONDS)
+                self.record(lag)
+            except Exception as e:
+                self.record(None, str(e) or type(e).__name__)
+        return self.healthy
+
+    def status(self) -> dict:
+        return {
+            "configured": db_session.replica_engine is not None,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "last_error": self.last_error,
+        }
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def _request_user_id(request: Request) -> Optional[str]:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token_subject(token)
+
+def record_write(user_id: str) -> None:
+    recent_writers.set(user_id, True)
+
+def _pinned_to_primary(request: Request) -> bool:
+    user_id = _request_user_id(request)
+    if user_id is None:
+        return False
+    if recent_writers.get(user_id) is not None:
+        return True
+    marker = request.headers.get(WRITE_MARKER_HEADER) or request.cookies.get(WRITE_MARKER_COOKIE)
+    # Bound to the user, so a marker can't pin anyone else
+    return marker is not None and write_marker_subject(marker) == user_id
+
+def get_read_db(request: Request):
+    """Like get_db, but may serve the request from the read replica"""
+    use_replica = (
+        db_session.ReplicaSessionLocal is not None
+        and not _pinned_to_primary(request)
+        and replica_monitor.check()
+    )
+    db = (db_session.ReplicaSessionLocal if use_replica else db_session.SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    """Like get_async_db, but may serve the request from the read replica"""
+    use_replica = (
+        db_session.AsyncReplicaSessionLocal is not None
+        and not _pinned_to_primary(request)
+        and await replica_monitor.check_async()
+    )
+    factory = db_session.AsyncReplicaSessionLocal if use_replica else db_session.AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """Pin users to the primary after a successful write"""
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        user_id = _request_user_id(request)
+        if user_id is not None:
+            record_write(user_id)
+            marker = create_write_marker(user_id)
+            response.headers[WRITE_MARKER_HEADER] = marker
+            response.set_cookie(
+                WRITE_MARKER_COOKIE, marker, max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True, samesite="lax", secure=request.url.scheme == "https"
+            )
+    return response
@@ -0,0 +1,101 @@
+"""
+Full-text search helpers.
+
+On PostgreSQL, events carry a generated `search_vector` tsvector (title,
+tags, description, venue, weighted in that order) with a GIN index, and tags
+have a GIN index of their own; see EVENT_SEARCH_DDL. Items are searched by
+trigram instead, which matches substrings and tolerates typos; see
+ITEM_SEARCH_DDL. Other databases fall back to case-insensitive LIKE.
+"""
+import re
+from typing import List, Optional
+from sqlalchemy import func, literal, literal_column, or_, text
+from sqlalchemy.sql.elements import ColumnElement
+
+TEXT_SEARCH_CONFIG = "english"
+MAX_QUERY_TERMS = 8
+
+# array_to_string is only STABLE, so it's wrapped in an IMMUTABLE function to
+# be usable in a generated column. Every statement is safe to re-run.
+EVENT_SEARCH_DDL = [
+    text("""
+        CREATE OR REPLACE FUNCTION events_search_vector(title TEXT, description TEXT, venue TEXT, tags TEXT[])
+        RETURNS tsvector LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT setweight(to_tsvector('english', coalesce(title, '')), 'A')
+                || setweight(to_tsvector('english', coalesce(array_to_string(tags, ' '), '')), 'B')
+                || setweight(to_tsvector('english', coalesce(description, '')), 'C')
+                || setweight(to_tsvector('english', coalesce(venue, '')), 'D')
+        $$
+    """),
+    text("""
+        ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (events_search_vector(title, description, venue, tags)) STORED
+    """),
+    text("CREATE INDEX IF NOT EXISTS idx_events_search ON events USING GIN (search_vector)"),
+    # Serves the `tags @> ARRAY[...]` filter in list_events
+    text("CREATE INDEX IF NOT EXISTS idx_events_tags ON events USING GIN (tags)"),
+]
+
+# One GIN index over status, category (btree_gin) and the trigrams of the
+# searchable text, so a search with either filter is a single index scan.
+ITEM_SEARCH_DDL = [
+    text("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+    text("CREATE EXTENSION IF NOT EXISTS btree_gin"),
+    text("""
+        CREATE OR REPLACE FUNCTION items_search_text(title TEXT, description TEXT, category TEXT, location TEXT)
+        RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT lower(coalesce(title, '') || ' ' || coalesce(description, '') || ' '
+                || coalesce(category, '') || ' ' || coalesce(location, ''))
+        $$
+    """),
+    text("""
+        CREATE INDEX IF NOT EXISTS idx_items_search ON items
+        USING GIN (status, category, items_search_text(title, description, category, location) gin_trgm_ops)
+    """),
+]
+
+# Minimum word_similarity for a typo-tolerant match; transaction-local
+SET_WORD_SIMILARITY_SQL = text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)")
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def supports_fts(dialect_name: str) -> bool:
+    return dialect_name == "postgresql"
+
+def prefix_tsquery(q: str) -> Optional[str]:
+    """'data struct' -> 'data:* & struct:*', or None if q has no searchable terms"""
+    terms = _TERM.findall(q.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+def event_search(q: str, dialect_name: str, columns: List[ColumnElement]):
+    """
+    Returns (filter, rank) for a search over events. `rank` is None on the
+    LIKE fallback, where results keep their normal order.
+    """
+    tsquery = prefix_tsquery(q)
+    if supports_fts(dialect_name) and tsquery:
+        vector = literal_column("events.search_vector")
+        query = func.to_tsquery(TEXT_SEARCH_CONFIG, tsquery)
+        return vector.op("@@")(query), func.ts_rank_cd(vector, query)
+    return or_(*[column.ilike(f"%{q}%") for column in columns]), None
+
+def _like_escape(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def item_search(q: str, dialect_name: str, columns: List[ColumnElement]):
+    """
+    Returns (filter, rank) for a search over items: a substring match, or any
+    word within the word-similarity threshold (run SET_WORD_SIMILARITY_SQL in
+    the same transaction). `rank` is None on the LIKE fallback.
+    """
+    if supports_fts(dialect_name):
+        title, description, category, location = columns
+        document = func.items_search_text(title, description, category, location)
+        term = literal(q.lower())
+        substring = document.like(f"%{_like_escape(q.lower())}%", escape="\\")
+        return or_(substring, term.op("<%")(document)), func.word_similarity(term, document)
+    pattern = f"%{_like_escape(q)}%"
+    return or_(*[column.ilike(pattern, escape="\\") for column in columns]), None
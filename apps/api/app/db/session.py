@@ -1,27 +1,83 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.db.pool_metrics import PoolMetrics, instrumented_pool
 
-# Normalize DB URL to use psycopg (v3) driver and SSL for Supabase
-_db_url = make_url(settings.DATABASE_URL)
-if _db_url.drivername == "postgresql":
-    _db_url = _db_url.set(drivername="postgresql+psycopg")
+def _normalize_url(raw_url: str):
+    # Normalize DB URL to use psycopg (v3) driver and SSL for Supabase
+    url = make_url(raw_url)
+    if url.drivername == "postgresql":
+        url = url.set(drivername="postgresql+psycopg")
 
-# Ensure sslmode=require (Supabase external connections)
-query = dict(_db_url.query)
-if "sslmode" not in query:
-    query["sslmode"] = "require"
-_db_url = _db_url.set(query=query)
+    # Ensure sslmode=require (Supabase external connections)
+    query = dict(url.query)
+    if "sslmode" not in query:
+        query["sslmode"] = "require"
+    return url.set(query=query)
+
+_db_url = _normalize_url(settings.DATABASE_URL)
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+engine_pool_metrics = PoolMetrics()
+async_engine_pool_metrics = PoolMetrics()
 
 engine = create_engine(
     _db_url,
-    pool_pre_ping=True,
-    echo=False
+    poolclass=instrumented_pool(QueuePool, engine_pool_metrics),
+    echo=False,
+    **_pool_options()
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for `async def` routes; psycopg 3 serves both from the same URL
+async_engine = create_async_engine(
+    _db_url,
+    poolclass=instrumented_pool(AsyncAdaptedQueuePool, async_engine_pool_metrics),
+    echo=False,
+    **_pool_options()
+)
+
+# expire_on_commit=False: attributes can't be lazily reloaded from async code
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Optional read replica; routing between it and the primary is in app.db.routing
+replica_engine = None
+async_replica_engine = None
+ReplicaSessionLocal = None
+AsyncReplicaSessionLocal = None
+if settings.DATABASE_REPLICA_URL:
+    _replica_url = _normalize_url(settings.DATABASE_REPLICA_URL)
+    # An unreachable replica fails fast instead of stalling reads and health checks
+    _replica_connect_args = {"connect_timeout": max(1, round(settings.REPLICA_HEALTH_CHECK_SECONDS))}
+    replica_engine = create_engine(
+        _replica_url,
+        poolclass=instrumented_pool(QueuePool, PoolMetrics()),
+        echo=False,
+        connect_args=_replica_connect_args,
+        **_pool_options()
+    )
+    async_replica_engine = create_async_engine(
+        _replica_url,
+        poolclass=instrumented_pool(AsyncAdaptedQueuePool, PoolMetrics()),
+        echo=False,
+        connect_args=_replica_connect_args,
+        **_pool_options()
+    )
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    AsyncReplicaSessionLocal = async_sessionmaker(async_replica_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -31,3 +87,6 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
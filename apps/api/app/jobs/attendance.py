@@ -0,0 +1,64 @@
+"""
+Repair drift between event_stats.attendee_count and the rsvps table.
+
+Usage: python -m app.jobs.attendance
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
+
+# Events per transaction; RSVPs to these events wait while the batch is counted
+BATCH_SIZE = 500
+
+# Creates counter rows for events that have none yet. Existing rows are left
+# alone: an RSVP may hold their lock.
+SEED_SQL = text("""
+    INSERT INTO event_stats (event_id, attendee_count)
+    SELECT e.id, count(r.user_id)
+    FROM events e
+    LEFT JOIN rsvps r ON r.event_id = e.id
+    WHERE NOT EXISTS (SELECT 1 FROM event_stats s WHERE s.event_id = e.id)
+    GROUP BY e.id
+    ON CONFLICT (event_id) DO NOTHING
+""")
+
+# Takes the same row locks as the RSVP endpoints, in id order
+LOCK_BATCH_SQL = text("""
+    SELECT event_id FROM event_stats
+    WHERE event_id > :after
+    ORDER BY event_id
+    LIMIT :limit
+    FOR UPDATE
+""")
+
+# Run as its own statement once the locks are held, so it counts every RSVP
+# committed before them and none can commit until the batch does
+FIX_BATCH_SQL = text("""
+    UPDATE event_stats s SET attendee_count = c.attendee_count
+    FROM (
+        SELECT s2.event_id, count(r.user_id) AS attendee_count
+        FROM event_stats s2
+        LEFT JOIN rsvps r ON r.event_id = s2.event_id
+        WHERE s2.event_id = ANY(:ids)
+        GROUP BY s2.event_id
+    ) c
+    WHERE s.event_id = c.event_id AND s.attendee_count IS DISTINCT FROM c.attendee_count
+    RETURNING s.event_id
+""")
+
+def reconcile_attendee_counts(db: Session) -> int:
+    """Returns the number of events whose count was corrected"""
+    db.execute(SEED_SQL)
+    db.commit()
+    fixed, after = 0, 0
+    while True:
+        ids = db.execute(LOCK_BATCH_SQL, {"after": after, "limit": BATCH_SIZE}).scalars().all()
+        if not ids:
+            return fixed
+        fixed += len(db.execute(FIX_BATCH_SQL, {"ids": list(ids)}).all())
+        db.commit()
+        after = ids[-1]
+
+if __name__ == "__main__":
+    with SessionLocal() as db:
+        print(f"Reconciled attendee counts for {reconcile_attendee_counts(db)} events")
@@ -0,0 +1,258 @@
+"""
+Embedding worker for lost-and-found items.
+
+Polls for items whose `embedding` is NULL (new items, and existing ones on
+first run), encodes their image and text in batches on CPU, and writes the
+result back. A batch is claimed in a short transaction that records a lease in
+item_embedding_leases, so several workers can run; downloads and encoding then
+happen without holding row locks, and a result is only written if the item's
+text and image are still what was encoded. A crashed worker's leases expire
+after EMBEDDING_LEASE_SECONDS. The model is loaded here, never in the API process.
+Images are only fetched from our own storage bucket; an item whose image
+can't be loaded is retried after EMBEDDING_RETRY_SECONDS and, after its last
+attempt, embedded from its text alone.
+
+Usage:
+    python -m app.jobs.embeddings            # run forever
+    python -m app.jobs.embeddings --once     # embed everything pending and exit
+    python -m app.jobs.embeddings --reembed  # recompute every item, e.g. after a model change
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import httpx
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.ml import embeddings
+from app.storage.backend import get_storage
+from app.storage.images import UPLOAD_BUCKET
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = "i.id, i.title, i.description, i.category, i.location, i.image_url"
+
+# Row locks are held only until the lease is committed. Two workers can lock
+# the same row in turn from stale snapshots; ON CONFLICT sees committed leases,
+# so only one gets it back.
+CLAIM_SQL = text(f"""
+    WITH candidates AS (
+        SELECT i.id
+        FROM items i
+        LEFT JOIN item_embedding_failures f ON f.item_id = i.id
+        LEFT JOIN item_embedding_leases l ON l.item_id = i.id
+        WHERE i.embedding IS NULL
+          AND (f.attempts IS NULL OR (f.attempts < :max_attempts
+               AND f.updated_at < now() - make_interval(secs => :retry_seconds)))
+          AND (l.item_id IS NULL OR l.expires_at < now())
+        ORDER BY i.id
+        LIMIT :batch_size
+        FOR UPDATE OF i SKIP LOCKED
+    ), claimed AS (
+        INSERT INTO item_embedding_leases (item_id, expires_at)
+        SELECT id, now() + make_interval(secs => :lease_seconds) FROM candidates
+        ON CONFLICT (item_id) DO UPDATE SET expires_at = EXCLUDED.expires_at
+        WHERE item_embedding_leases.expires_at < now()
+        RETURNING item_id
+    )
+    SELECT {_COLUMNS}, coalesce(f.attempts, 0) AS attempts
+    FROM claimed c
+    JOIN items i ON i.id = c.item_id
+    LEFT JOIN item_embedding_failures f ON f.item_id = i.id
+    ORDER BY i.id
+""")
+
+RELEASE_SQL = text("DELETE FROM item_embedding_leases WHERE item_id = ANY(:ids)")
+
+ALL_AFTER_SQL = text(f"""
+    SELECT {_COLUMNS}
+    FROM items i
+    WHERE i.id > :after_id
+    ORDER BY i.id
+    LIMIT :batch_size
+""")
+
+# Skipped if the item was edited (or deleted) while it was being encoded; an
+# edit clears the embedding, so it's picked up again
+_UNCHANGED = """
+    title IS NOT DISTINCT FROM :title AND description IS NOT DISTINCT FROM :description
+    AND category IS NOT DISTINCT FROM :category AND location IS NOT DISTINCT FROM :location
+    AND image_url IS NOT DISTINCT FROM :image_url
+"""
+
+UPDATE_SQL = text(f"UPDATE items SET embedding = CAST(:embedding AS vector) WHERE id = :id AND {_UNCHANGED}")
+
+UPDATE_PENDING_SQL = text(f"""
+    UPDATE items SET embedding = CAST(:embedding AS vector)
+    WHERE id = :id AND embedding IS NULL AND {_UNCHANGED}
+""")
+
+CLEAR_FAILURE_SQL = text("DELETE FROM item_embedding_failures WHERE item_id = ANY(:ids)")
+
+RECORD_FAILURE_SQL = text("""
+    INSERT INTO item_embedding_failures (item_id, attempts, last_error, updated_at)
+    VALUES (:id, 1, :error, now())
+    ON CONFLICT (item_id) DO UPDATE SET
+        attempts = item_embedding_failures.attempts + 1,
+        last_error = EXCLUDED.last_error,
+        updated_at = now()
+""")
+
+
+class DisallowedImageURL(ValueError):
+    """image_url is user-supplied; only our own storage is ever fetched"""
+
+
+def _check_url(url: str) -> None:
+    prefix = get_storage().public_url(UPLOAD_BUCKET, "")
+    if not url.startswith(prefix) or ".." in url[len(prefix):]:
+        raise DisallowedImageURL(f"not under {prefix}")
+
+def _download(client: httpx.Client, url: str) -> bytes:
+    _check_url(url)
+    storage = get_storage()
+    # The local backend's URLs may be relative to the API; read its files directly
+    prefix = storage.public_url(UPLOAD_BUCKET, "")
+    path = storage.local_path(UPLOAD_BUCKET, url[len(prefix):])
+    if path is not None:
+        if path.stat().st_size > settings.EMBEDDING_MAX_IMAGE_BYTES:
+            raise ValueError(f"image larger than {settings.EMBEDDING_MAX_IMAGE_BYTES} bytes")
+        return path.read_bytes()
+    chunks, size = [], 0
+    with client.stream("GET", url) as resp:
+        # Redirects aren't followed: they could point anywhere
+        if resp.status_code != 200:
+            raise ValueError(f"HTTP {resp.status_code}")
+        for chunk in resp.iter_bytes():
+            size += len(chunk)
+            if size > settings.EMBEDDING_MAX_IMAGE_BYTES:
+                raise ValueError(f"image larger than {settings.EMBEDDING_MAX_IMAGE_BYTES} bytes")
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+def _load_images(rows) -> List[Optional[object]]:
+    """Per row: a PIL image, None if the item has no image, or the exception that loading raised"""
+    def load(row):
+        if not row.image_url:
+            return None
+        try:
+            return embeddings.open_image(_download(client, row.image_url))
+        except Exception as e:
+            return e
+
+    with httpx.Client(timeout=settings.EMBEDDING_DOWNLOAD_TIMEOUT_SECONDS, follow_redirects=False) as client:
+        with ThreadPoolExecutor(max_workers=settings.EMBEDDING_DOWNLOAD_CONCURRENCY) as pool:
+            return list(pool.map(load, rows))
+
+def embed_batch(db: Session, rows, retry_images: bool = False) -> int:
+    """
+    Encodes and stores one batch; returns how many items were embedded. Holds
+    no locks while downloading and encoding. An image that can't be loaded is
+    retried on a later run when retry_images is set; after the last attempt
+    the item is embedded from its text alone.
+    """
+    images = _load_images(rows)
+    ok, failures = [], []
+    for row, image in zip(rows, images):
+        if isinstance(image, Exception):
+            logger.warning("Item %s: couldn't load image %s: %s", row.id, row.image_url, image)
+            failures.append({"id": row.id, "error": str(image)[:500]})
+            retry = (
+                retry_images and not isinstance(image, DisallowedImageURL)
+                and row.attempts + 1 < settings.EMBEDDING_MAX_ATTEMPTS
+            )
+            if retry:
+                continue
+            image = None
+        ok.append((row, image))
+
+    written, loaded = 0, []
+    if ok:
+        text_vectors = embeddings.encode_texts([
+            embeddings.item_text(row.title, row.description, row.category, row.location) for row, _ in ok
+        ])
+        with_image = [i for i, (_, image) in enumerate(ok) if image is not None]
+        image_vectors = dict(zip(with_image, embeddings.encode_images([ok[i][1] for i in with_image])))
+
+        update_sql = UPDATE_PENDING_SQL if retry_images else UPDATE_SQL
+        for i, (row, image) in enumerate(ok):
+            vector = embeddings.combine(text_vectors[i], image_vectors.get(i))
+            result = db.execute(update_sql, {
+                "id": row.id, "embedding": embeddings.to_pgvector(vector), "title": row.title,
+                "description": row.description, "category": row.category,
+                "location": row.location, "image_url": row.image_url,
+            })
+            written += result.rowcount
+            if result.rowcount and image is not None:
+                loaded.append(row.id)
+
+    if failures:
+        db.execute(RECORD_FAILURE_SQL, failures)
+    # Text-only fallbacks keep their failure row as a record of the missing image
+    if loaded:
+        db.execute(CLEAR_FAILURE_SQL, {"ids": loaded})
+    return written
+
+def embed_pending(db: Session) -> int:
+    """Embeds every pending item, one leased batch at a time"""
+    total = 0
+    while True:
+        rows = db.execute(CLAIM_SQL, {
+            "max_attempts": settings.EMBEDDING_MAX_ATTEMPTS,
+            "retry_seconds": settings.EMBEDDING_RETRY_SECONDS,
+            "batch_size": settings.EMBEDDING_BATCH_SIZE,
+            "lease_seconds": settings.EMBEDDING_LEASE_SECONDS,
+        }).all()
+        db.commit()
+        if not rows:
+            return total
+        ids = [row.id for row in rows]
+        try:
+            total += embed_batch(db, rows, retry_images=True)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            # Committed with the results; also on failure, so the batch isn't
+            # stuck until the leases expire
+            db.execute(RELEASE_SQL, {"ids": ids})
+            db.commit()
+
+def reembed_all(db: Session) -> int:
+    total, after_id = 0, 0
+    while True:
+        rows = db.execute(ALL_AFTER_SQL, {"after_id": after_id, "batch_size": settings.EMBEDDING_BATCH_SIZE}).all()
+        db.commit()
+        if not rows:
+            return total
+        total += embed_batch(db, rows)
+        db.commit()
+        after_id = rows[-1].id
+        logger.info("Re-embedded %d items (up to id %d)", total, after_id)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true", help="embed pending items and exit")
+    parser.add_argument("--reembed", action="store_true", help="recompute every item's embedding and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    embeddings.load_model()
+    with SessionLocal() as db:
+        if args.reembed:
+            print(f"Re-embedded {reembed_all(db)} items")
+        else:
+            while True:
+                try:
+                    embedded = embed_pending(db)
+                    if embedded:
+                        logger.info("Embedded %d items", embedded)
+                except Exception:
+                    logger.exception("Embedding run failed")
+                    db.rollback()
+                if args.once:
+                    break
+                time.sleep(settings.EMBEDDING_POLL_SECONDS)
@@ -0,0 +1,178 @@
+"""
+Automatic lost/found matching.
+
+Each run takes items that have an embedding but haven't been scanned yet,
+scores them against active items posted within MATCH_WINDOW_DAYS of them
+(embedding similarity plus category, location and time proximity) and
+notifies both posters of each new likely match. Work is proportional to the
+new items times the window, never the whole table.
+
+Usage: python -m app.jobs.matching [--once]
+"""
+import argparse
+import logging
+import math
+import re
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.ml.similarity import as_vector
+from app.models.item_match import item_matches, item_match_scans
+from app.models.notification import Notification
+
+logger = logging.getLogger(__name__)
+
+# Score weights; embedding similarity dominates, the rest break ties
+EMBEDDING_WEIGHT = 0.7
+CATEGORY_WEIGHT = 0.1
+LOCATION_WEIGHT = 0.1
+TIME_WEIGHT = 0.1
+TIME_DECAY_DAYS = 7.0
+
+_COLUMNS = "i.id, i.title, i.category, i.location, i.finder_id, i.created_at, i.embedding"
+
+PENDING_SQL = text(f"""
+    SELECT {_COLUMNS}
+    FROM items i
+    WHERE i.embedding IS NOT NULL
+      AND i.status = 'active'
+      AND i.created_at >= now() - make_interval(days => :window_days)
+      AND NOT EXISTS (SELECT 1 FROM item_match_scans s WHERE s.item_id = i.id)
+    ORDER BY i.id
+    LIMIT :batch_size
+    FOR UPDATE OF i SKIP LOCKED
+""")
+
+# One window spanning the whole batch, served by idx_items_status_created_at_id
+CANDIDATES_SQL = text(f"""
+    SELECT {_COLUMNS}
+    FROM items i
+    WHERE i.status = 'active'
+      AND i.embedding IS NOT NULL
+      AND i.created_at BETWEEN :start AND :end
+""")
+
+_WORD = re.compile(r"\w+")
+
+
+def _words(value) -> set:
+    return set(_WORD.findall(value.lower())) if value else set()
+
+def _location_similarity(a, b) -> float:
+    wa, wb = _words(a), _words(b)
+    return len(wa & wb) / len(wa | wb) if wa and wb else 0.0
+
+def score_candidates(item, candidates, vectors: np.ndarray, window: timedelta) -> List[Tuple[object, float]]:
+    """(candidate, score) pairs above MATCH_MIN_SCORE, best first"""
+    cosine = vectors @ as_vector(item.embedding)
+    scored = []
+    for candidate, similarity in zip(candidates, cosine.tolist()):
+        if candidate.id == item.id or (item.finder_id and candidate.finder_id == item.finder_id):
+            continue
+        gap = abs(candidate.created_at - item.created_at)
+        if gap > window:
+            continue
+        score = (
+            EMBEDDING_WEIGHT * similarity
+            + CATEGORY_WEIGHT * float(bool(item.category) and candidate.category == item.category)
+            + LOCATION_WEIGHT * _location_similarity(item.location, candidate.location)
+            + TIME_WEIGHT * math.exp(-gap.total_seconds() / 86400 / TIME_DECAY_DAYS)
+        )
+        if score >= settings.MATCH_MIN_SCORE:
+            scored.append((candidate, score))
+    scored.sort(key=lambda pair: pair[1], reverse=True)
+    return scored[:settings.MATCH_MAX_PER_ITEM]
+
+def _notifications(matches: List[Tuple[object, object, float]]) -> List[dict]:
+    """One notification per recipient for the whole batch"""
+    by_recipient: Dict[object, List[Tuple[object, object]]] = defaultdict(list)
+    for item, candidate, _ in matches:
+        if candidate.finder_id:
+            by_recipient[candidate.finder_id].append((candidate, item))
+        if item.finder_id:
+            by_recipient[item.finder_id].append((item, candidate))
+
+    rows = []
+    for user_id, pairs in by_recipient.items():
+        own, other = pairs[0]
+        if len(pairs) == 1:
+            message = f"\"{other.title}\" may match your post \"{own.title}\""
+            link = f"/items/{other.id}"
+        else:
+            message = f"{len(pairs)} posted items may match yours, including \"{other.title}\""
+            link = "/items"
+        rows.append({"user_id": user_id, "type": "item_match", "title": "Possible match found", "message": message, "link": link})
+    return rows
+
+def match_batch(db: Session) -> Optional[int]:
+    """Scans one batch of new items; returns the number of new matches, or None if nothing was pending"""
+    window = timedelta(days=settings.MATCH_WINDOW_DAYS)
+    items = db.execute(PENDING_SQL, {
+        "window_days": settings.MATCH_WINDOW_DAYS,
+        "batch_size": settings.MATCH_BATCH_SIZE,
+    }).all()
+    if not items:
+        return None
+
+    candidates = db.execute(CANDIDATES_SQL, {
+        "start": min(i.created_at for i in items) - window,
+        "end": max(i.created_at for i in items) + window,
+    }).all()
+    vectors = np.stack([as_vector(c.embedding) for c in candidates]) if candidates else None
+
+    # Keyed by ordered pair: two new items in one batch would otherwise match twice
+    found = {}
+    if vectors is not None:
+        for item in items:
+            for candidate, score in score_candidates(item, candidates, vectors, window):
+                found.setdefault((min(item.id, candidate.id), max(item.id, candidate.id)), (item, candidate, score))
+
+    new_matches = []
+    if found:
+        # Pairs already recorded (e.g. when the other item was scanned first) are skipped
+        inserted = {tuple(row) for row in db.execute(
+            pg_insert(item_matches)
+            .values([
+                {"item_id": pair[0], "matched_item_id": pair[1], "score": round(score, 4)}
+                for pair, (_, _, score) in found.items()
+            ])
+            .on_conflict_do_nothing()
+            .returning(item_matches.c.item_id, item_matches.c.matched_item_id)
+        )}
+        new_matches = [match for pair, match in found.items() if pair in inserted]
+        notifications = _notifications(new_matches)
+        if notifications:
+            db.execute(insert(Notification), notifications)
+
+    db.execute(pg_insert(item_match_scans).values([{"item_id": i.id} for i in items]).on_conflict_do_nothing())
+    db.commit()
+    return len(new_matches)
+
+def match_pending(db: Session) -> int:
+    total = 0
+    while True:
+        matched = match_batch(db)
+        if matched is None:
+            return total
+        total += matched
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true", help="scan pending items and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        while True:
+            matched = match_pending(db)
+            if matched:
+                logger.info("Found %d new item matches", matched)
+            if args.once:
+                break
+            time.sleep(settings.MATCH_POLL_SECONDS)
@@ -0,0 +1,110 @@
+"""
+Event reminder dispatcher.
+
+Every REMINDER_INTERVAL_SECONDS, finds events starting within each of
+REMINDER_WINDOWS_MINUTES and notifies everyone who RSVPed, with one
+INSERT ... SELECT per event. Runs inside the API process when
+REMINDER_SCHEDULER_ENABLED is set, or standalone:
+
+Usage: python -m app.jobs.reminders [--once]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, literal, exists, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.event import Event, rsvps
+from app.models.event_reminder import event_reminders
+from app.models.notification import Notification
+
+logger = logging.getLogger(__name__)
+
+
+def _claim(db: Session, event_id: int, window: int, windows: list) -> bool:
+    """
+    Mark this window (and any longer one, which would only repeat it) as sent.
+    Blocks on another worker's uncommitted claim, then returns False.
+    """
+    claimed = db.execute(
+        pg_insert(event_reminders)
+        .values([{"event_id": event_id, "window_minutes": w} for w in windows if w >= window])
+        .on_conflict_do_nothing()
+        .returning(event_reminders.c.window_minutes)
+    ).scalars().all()
+    return window in claimed
+
+def _notify_attendees(db: Session, event) -> int:
+    message = f"{event.title} starts {event.start_time:%a %d %b, %H:%M} UTC"
+    if event.venue:
+        message += f" at {event.venue}"
+    attendees = select(
+        rsvps.c.user_id,
+        literal("event_reminder"),
+        literal("Upcoming event"),
+        literal(message),
+        literal(f"/events/{event.id}")
+    ).where(rsvps.c.event_id == event.id)
+    result = db.execute(
+        insert(Notification).from_select(["user_id", "type", "title", "message", "link"], attendees)
+    )
+    return result.rowcount
+
+def dispatch_reminders(db: Session, now: datetime = None) -> int:
+    """Sends every due reminder; returns the number of notifications created"""
+    now = now or datetime.utcnow()
+    windows = sorted(settings.REMINDER_WINDOWS_MINUTES)
+    sent = 0
+    # Shortest window first, so an event already inside it gets one reminder, not one per window
+    for window in windows:
+        due = db.execute(select(Event.id, Event.title, Event.start_time, Event.venue).where(
+            Event.start_time > now,
+            Event.start_time <= now + timedelta(minutes=window),
+            ~exists().where(and_(
+                event_reminders.c.event_id == Event.id,
+                event_reminders.c.window_minutes == window
+            ))
+        ).order_by(Event.start_time)).all()
+        for event in due:
+            try:
+                if _claim(db, event.id, window, windows):
+                    sent += _notify_attendees(db, event)
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("Reminder for event %s (%s min) failed", event.id, window)
+    return sent
+
+
+async def run_scheduler(stop: asyncio.Event) -> None:
+    """In-process loop; the dispatch itself runs in a worker thread"""
+    while not stop.is_set():
+        try:
+            sent = await asyncio.to_thread(_dispatch_once)
+            if sent:
+                logger.info("Sent %d event reminders", sent)
+        except Exception:
+            logger.exception("Reminder dispatch failed")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.REMINDER_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+def _dispatch_once() -> int:
+    with SessionLocal() as db:
+        return dispatch_reminders(db)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true", help="dispatch due reminders and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        print(f"Sent {_dispatch_once()} event reminders")
+        if args.once:
+            break
+        time.sleep(settings.REMINDER_INTERVAL_SECONDS)
@@ -0,0 +1,149 @@
+"""
+Post-processing for direct uploads.
+
+Claims uploads the client has completed (/upload/{id}/complete), downloads the
+original from the private UPLOAD_ORIGINALS_BUCKET and does what /upload/image
+does inline: variants, perceptual hash and dedup. The original is deleted once
+processed. Uploads never completed within UPLOAD_ABANDONED_HOURS are removed.
+Rows are claimed with SKIP LOCKED, so several workers can run. Items created
+with the resulting URL are embedded by app.jobs.embeddings as usual.
+
+Usage: python -m app.jobs.uploads [--once]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import timedelta
+from sqlalchemy import select, update, delete, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.http_client import close_storage_client
+from app.core.images import process_image, DEFAULT_VARIANT
+from app.db.session import AsyncSessionLocal
+from app.models.direct_upload import direct_uploads
+from app.storage.backend import get_storage
+from app.storage.images import find_duplicate, store_variants, record_hash, original_path
+
+logger = logging.getLogger(__name__)
+
+
+def _process_bytes(content: bytes):
+    fd, path = tempfile.mkstemp(prefix="upload-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        return process_image(path, settings.IMAGE_FORMAT, settings.IMAGE_QUALITY, settings.IMAGE_MAX_PIXELS)
+    finally:
+        os.unlink(path)
+
+async def _delete_original(upload_id) -> None:
+    try:
+        await get_storage().delete(settings.UPLOAD_ORIGINALS_BUCKET, original_path(upload_id))
+    except Exception as e:
+        logger.warning("Upload %s: couldn't delete original: %s", upload_id, getattr(e, "detail", e))
+
+async def process_upload(db: AsyncSession, row) -> str:
+    """
+    Processes one claimed upload and returns its new status: "uploaded" if it
+    failed and will be retried, "failed" if it won't be.
+    """
+    try:
+        # Capped again here: /complete checked the size, but not what's read now
+        content = await get_storage().get(
+            settings.UPLOAD_ORIGINALS_BUCKET, original_path(row.id), max_bytes=settings.UPLOAD_MAX_BYTES
+        )
+        variants, phash = await asyncio.to_thread(_process_bytes, content)
+        existing = await find_duplicate(db, row.uploader_id, phash) if settings.IMAGE_DEDUP_ENABLED else None
+        urls = None if existing else await store_variants(row.id, variants)
+    except Exception as e:
+        error = str(getattr(e, "detail", e))[:500]
+        logger.warning("Upload %s: processing failed: %s", row.id, error)
+        too_large = getattr(e, "status_code", None) == 413
+        failed = too_large or row.attempts + 1 >= settings.UPLOAD_PROCESSING_MAX_ATTEMPTS
+        status = "failed" if failed else "uploaded"
+        await db.execute(
+            update(direct_uploads).where(direct_uploads.c.id == row.id).values(
+                attempts=direct_uploads.c.attempts + 1,
+                last_error="too large" if too_large else error,
+                status=status,
+                updated_at=func.now()
+            )
+        )
+        return status
+
+    if existing:
+        status, url = "duplicate", existing
+    else:
+        status, url = "ready", urls[DEFAULT_VARIANT]
+        await record_hash(db, row.uploader_id, phash, url)
+    await db.execute(
+        update(direct_uploads).where(direct_uploads.c.id == row.id)
+        .values(status=status, url=url, last_error=None, updated_at=func.now())
+    )
+    return status
+
+async def process_pending(db: AsyncSession) -> int:
+    """Processes every completed upload, one committed batch at a time"""
+    total = 0
+    retry_before = func.now() - timedelta(seconds=settings.UPLOAD_PROCESSING_RETRY_SECONDS)
+    while True:
+        rows = (await db.execute(
+            select(direct_uploads)
+            .where(
+                direct_uploads.c.status == "uploaded",
+                # Failed attempts wait before they're retried
+                or_(direct_uploads.c.attempts == 0, direct_uploads.c.updated_at < retry_before)
+            )
+            .order_by(direct_uploads.c.created_at)
+            .limit(settings.UPLOAD_PROCESSING_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )).all()
+        if not rows:
+            return total
+        finished = []
+        for row in rows:
+            status = await process_upload(db, row)
+            if status != "uploaded":
+                finished.append(row.id)
+            total += status in ("ready", "duplicate")
+        await db.commit()
+        # Only once committed, so a crash before this leaves the original to retry from
+        for upload_id in finished:
+            await _delete_original(upload_id)
+
+async def remove_abandoned(db: AsyncSession) -> int:
+    cutoff = func.now() - timedelta(hours=settings.UPLOAD_ABANDONED_HOURS)
+    ids = (await db.execute(
+        delete(direct_uploads)
+        .where(direct_uploads.c.status == "pending", direct_uploads.c.created_at < cutoff)
+        .returning(direct_uploads.c.id)
+    )).scalars().all()
+    await db.commit()
+    for upload_id in ids:
+        await _delete_original(upload_id)
+    return len(ids)
+
+async def run(once: bool) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            while True:
+                removed = await remove_abandoned(db)
+                if removed:
+                    logger.info("Removed %d abandoned uploads", removed)
+                processed = await process_pending(db)
+                if processed:
+                    logger.info("Processed %d uploads", processed)
+                if once:
+                    break
+                await asyncio.sleep(settings.UPLOAD_PROCESSING_POLL_SECONDS)
+    finally:
+        await close_storage_client()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true", help="process completed uploads and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.once))
@@ -1,7 +1,19 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.core.security import password_pool
+from app.db import session as db_session
+from app.db.routing import read_your_writes_middleware, WRITE_MARKER_HEADER
+from app.db.query_stats import query_stats_middleware
+from app.core import metrics
+from app.jobs.reminders import run_scheduler
+from app.ml.similarity import query_pool
+from app.ml.embeddings import warm_up as warm_up_embeddings
+from app.core.http_client import close_storage_client
+from app.api.v1.endpoints.upload import image_pool
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -18,11 +30,55 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets browser clients read the read-your-writes marker and send it back
+    expose_headers=[WRITE_MARKER_HEADER],
 )
 
+app.middleware("http")(query_stats_middleware)
+# Registered after query stats so it wraps it and can read request.state.query_stats
+app.middleware("http")(metrics.metrics_middleware)
+
+if db_session.replica_engine is not None:
+    app.middleware("http")(read_your_writes_middleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+reminder_stop = asyncio.Event()
+
+@app.on_event("startup")
+async def start_reminder_scheduler():
+    if settings.REMINDER_SCHEDULER_ENABLED:
+        app.state.reminder_task = asyncio.create_task(run_scheduler(reminder_stop))
+
+@app.on_event("startup")
+def warm_query_pool():
+    # Load CLIP now rather than inside the first by-image search's timeout
+    if settings.EMBEDDING_QUERY_WARM_UP:
+        query_pool.warm(warm_up_embeddings)
+
+@app.on_event("shutdown")
+async def stop_reminder_scheduler():
+    reminder_stop.set()
+    task = getattr(app.state, "reminder_task", None)
+    if task is not None:
+        await task
+
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    await close_storage_client()
+
+@app.on_event("shutdown")
+def shutdown_pools():
+    password_pool.shutdown()
+    query_pool.shutdown()
+    image_pool.shutdown()
+
 @app.get("/")
 def root():
     return {"message": "CampusConnect API"}
 
+# async so threadpool gauges are read on the event loop thread
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
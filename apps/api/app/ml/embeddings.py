@@ -0,0 +1,78 @@
+"""
+CLIP embeddings for lost-and-found items.
+
+Images and text are encoded into the same 512-dimensional space, so an item
+photo can be matched against another photo or a text description. torch and
+sentence-transformers are imported on first use, so importing this module
+from the API is cheap; only the embedding worker loads the model.
+"""
+import io
+import threading
+from typing import List, Optional, Sequence
+import numpy as np
+from app.core.config import settings
+
+EMBEDDING_DIM = 512
+MAX_TEXT_WORDS = 40
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            import torch
+            from sentence_transformers import SentenceTransformer
+            if settings.EMBEDDING_TORCH_THREADS > 0:
+                torch.set_num_threads(settings.EMBEDDING_TORCH_THREADS)
+            _model = SentenceTransformer(settings.EMBEDDING_MODEL_NAME, device="cpu")
+    return _model
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def open_image(data: bytes):
+    from PIL import Image
+    image = Image.open(io.BytesIO(data))
+    image.draft("RGB", (448, 448))  # JPEG: decode at reduced size, CLIP only needs 224px
+    return image.convert("RGB")
+
+def encode_images(images: Sequence) -> np.ndarray:
+    if not images:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    vectors = load_model().encode(list(images), batch_size=settings.EMBEDDING_BATCH_SIZE, convert_to_numpy=True)
+    return _normalize(vectors.astype(np.float32))
+
+def encode_texts(texts: Sequence[str]) -> np.ndarray:
+    if not texts:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    vectors = load_model().encode(list(texts), batch_size=settings.EMBEDDING_BATCH_SIZE, convert_to_numpy=True)
+    return _normalize(vectors.astype(np.float32))
+
+def item_text(title: str, description: Optional[str], category: Optional[str], location: Optional[str]) -> str:
+    text = ". ".join(part for part in (title, category, description, location) if part)
+    # CLIP's text encoder takes 77 tokens; keep well inside it
+    return " ".join(text.split()[:MAX_TEXT_WORDS])
+
+def combine(text_vector: np.ndarray, image_vector: Optional[np.ndarray]) -> np.ndarray:
+    """An item's embedding: the normalized mean of its image and text vectors"""
+    if image_vector is None:
+        return text_vector
+    return _normalize(text_vector + image_vector)
+
+def to_pgvector(vector: np.ndarray) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in vector.tolist()) + "]"
+
+def from_pgvector(value: str) -> np.ndarray:
+    return np.array([float(x) for x in value.strip("[]").split(",")], dtype=np.float32)
+
+def warm_up() -> None:
+    """Loads the model in a pool worker ahead of the first query (returns nothing to pickle)"""
+    load_model()
+
+def embed_image_bytes(data: bytes) -> List[float]:
+    """Entry point for the query process pool (picklable arguments and result)"""
+    return encode_images([open_image(data)])[0].tolist()
@@ -0,0 +1,106 @@
+"""
+Nearest-neighbour search over item embeddings.
+
+On PostgreSQL this is an ORDER BY on cosine distance served by the ivfflat
+index; `probes` trades recall for latency (lists = 100, so probes = 100 is an
+exact scan). Elsewhere, e.g. a local test database without pgvector, an
+in-process NumPy brute-force index stands in.
+"""
+import asyncio
+import time
+from typing import List, Optional, Tuple
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.process_pool import BoundedProcessPool
+from app.ml.embeddings import EMBEDDING_DIM, from_pgvector, to_pgvector
+
+# Encodes uploaded query images; the model loads in these processes, not the API's
+query_pool = BoundedProcessPool(
+    name="image-embedding",
+    max_workers=settings.EMBEDDING_QUERY_WORKERS,
+    max_pending=settings.EMBEDDING_QUERY_MAX_PENDING,
+    timeout=settings.EMBEDDING_QUERY_TIMEOUT_SECONDS
+)
+
+NEAREST_SQL = text("""
+    SELECT id, embedding <=> CAST(:query AS vector) AS distance
+    FROM items
+    WHERE status = 'active' AND embedding IS NOT NULL AND id <> :exclude_id
+    ORDER BY embedding <=> CAST(:query AS vector)
+    LIMIT :k
+""")
+
+ACTIVE_EMBEDDINGS_SQL = text("SELECT id, embedding FROM items WHERE status = 'active' AND embedding IS NOT NULL")
+
+
+def supports_pgvector(dialect_name: str) -> bool:
+    return dialect_name == "postgresql"
+
+def as_vector(value) -> np.ndarray:
+    """Without the pgvector adapter registered, vectors come back as '[x,y,...]' text"""
+    if isinstance(value, str):
+        return from_pgvector(value)
+    return np.asarray(value, dtype=np.float32)
+
+async def item_embedding(db: AsyncSession, item_id: int) -> Optional[np.ndarray]:
+    value = await db.scalar(text("SELECT embedding FROM items WHERE id = :id"), {"id": item_id})
+    return None if value is None else as_vector(value)
+
+
+class NumpyIndex:
+    """Exact cosine search over active items, reloaded at most every `ttl` seconds"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def build(self, ids, vectors) -> None:
+        self.ids = np.asarray(ids, dtype=np.int64)
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(self.ids), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms == 0, 1, norms)
+        self.loaded_at = time.monotonic()
+
+    async def refresh(self, db: AsyncSession) -> None:
+        async with self._lock:
+            if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl:
+                return
+            rows = (await db.execute(ACTIVE_EMBEDDINGS_SQL)).all()
+            self.build([r.id for r in rows], [as_vector(r.embedding) for r in rows])
+
+    def search(self, query: np.ndarray, k: int, exclude_id: int = -1) -> List[Tuple[int, float]]:
+        if not len(self.ids):
+            return []
+        scores = self.matrix @ (query / (np.linalg.norm(query) or 1))
+        scores[self.ids == exclude_id] = -np.inf
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+
+numpy_index = NumpyIndex(ttl=settings.VECTOR_FALLBACK_REFRESH_SECONDS)
+
+
+async def nearest_items(
+    db: AsyncSession,
+    query: np.ndarray,
+    k: int,
+    probes: int,
+    exclude_id: int = -1
+) -> List[Tuple[int, float]]:
+    """(item id, cosine similarity) for the k nearest active items, best first"""
+    if supports_pgvector(db.bind.dialect.name):
+        # Transaction-local, so it doesn't leak to the next user of this connection
+        await db.execute(text("SELECT set_config('ivfflat.probes', :probes, true)"), {"probes": str(probes)})
+        rows = await db.execute(NEAREST_SQL, {"query": to_pgvector(query), "exclude_id": exclude_id, "k": k})
+        return [(r.id, 1 - float(r.distance)) for r in rows.all()]
+    await numpy_index.refresh(db)
+    return numpy_index.search(query, k, exclude_id)
@@ -0,0 +1,22 @@
+from sqlalchemy import Table, Column, Integer, Text, DateTime, ForeignKey, Index, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.session import Base
+
+# Uploads that go straight from the client to storage. The id is also the
+# object folder. status: pending (URL issued) -> uploaded (client completed)
+# -> ready | duplicate | failed, set by the app.jobs.uploads worker.
+direct_uploads = Table(
+    "direct_uploads",
+    Base.metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("uploader_id", UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("content_type", Text, nullable=False),
+    Column("status", Text, nullable=False, server_default="pending"),
+    Column("url", Text),
+    Column("attempts", Integer, nullable=False, server_default="0"),
+    Column("last_error", Text),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    # The worker's queue and the abandoned-upload sweep; finished rows stay out of it
+    Index("idx_direct_uploads_open", "status", "created_at", postgresql_where=text("status IN ('pending', 'uploaded')")),
+)
@@ -0,0 +1,22 @@
+from sqlalchemy import Table, Column, Integer, DateTime, ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.session import Base
+
+# Denormalized RSVP count per event, kept in step with rsvps by the RSVP
+# endpoints and repaired by app.jobs.attendance.reconcile_attendee_counts
+event_stats = Table(
+    "event_stats",
+    Base.metadata,
+    Column("event_id", Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True),
+    Column("attendee_count", Integer, nullable=False, default=0, server_default="0"),
+)
+
+# Users waiting for a seat on a full event, promoted in created_at order
+event_waitlist = Table(
+    "event_waitlist",
+    Base.metadata,
+    Column("event_id", Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True),
+    Column("user_id", UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Index("idx_event_waitlist_queue", "event_id", "created_at"),
+)
@@ -0,0 +1,13 @@
+from sqlalchemy import Table, Column, Integer, DateTime, ForeignKey, func
+from app.db.session import Base
+
+# One row per (event, reminder window) already sent. Inserted in the same
+# transaction as the notifications, so its primary key makes dispatch
+# idempotent across restarts and concurrent workers.
+event_reminders = Table(
+    "event_reminders",
+    Base.metadata,
+    Column("event_id", Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True),
+    Column("window_minutes", Integer, primary_key=True),
+    Column("sent_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
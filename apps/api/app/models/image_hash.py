@@ -0,0 +1,24 @@
+from sqlalchemy import Table, Column, Integer, BigInteger, Text, DateTime, ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.session import Base
+
+# Perceptual hash of every stored upload. Each 16-bit band is indexed with the
+# uploader, so a near-duplicate lookup is four index probes plus a Hamming
+# check on the few rows that share a band.
+image_hashes = Table(
+    "image_hashes",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("uploader_id", UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("phash", BigInteger, nullable=False),
+    Column("band0", Integer, nullable=False),
+    Column("band1", Integer, nullable=False),
+    Column("band2", Integer, nullable=False),
+    Column("band3", Integer, nullable=False),
+    Column("url", Text, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Index("idx_image_hashes_band0", "uploader_id", "band0"),
+    Index("idx_image_hashes_band1", "uploader_id", "band1"),
+    Index("idx_image_hashes_band2", "uploader_id", "band2"),
+    Index("idx_image_hashes_band3", "uploader_id", "band3"),
+)
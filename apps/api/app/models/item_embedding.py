@@ -0,0 +1,22 @@
+from sqlalchemy import Table, Column, Integer, Text, DateTime, ForeignKey, func
+from app.db.session import Base
+
+# Items the embedding worker couldn't encode (e.g. an unreachable image).
+# Skipped once attempts reaches EMBEDDING_MAX_ATTEMPTS; delete a row to retry.
+item_embedding_failures = Table(
+    "item_embedding_failures",
+    Base.metadata,
+    Column("item_id", Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True),
+    Column("attempts", Integer, nullable=False, default=1, server_default="1"),
+    Column("last_error", Text),
+    Column("updated_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+# Items a worker has claimed and is encoding, so others skip them without the
+# row locks being held through downloads and inference. Expired leases are reclaimed.
+item_embedding_leases = Table(
+    "item_embedding_leases",
+    Base.metadata,
+    Column("item_id", Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True),
+    Column("expires_at", DateTime(timezone=True), nullable=False),
+)
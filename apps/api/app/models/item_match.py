@@ -0,0 +1,22 @@
+from sqlalchemy import Table, Column, Integer, Float, DateTime, ForeignKey, CheckConstraint, func
+from app.db.session import Base
+
+# Likely lost/found pairs found by app.jobs.matching, stored once per pair
+# (item_id < matched_item_id) so each pair is only ever notified once
+item_matches = Table(
+    "item_matches",
+    Base.metadata,
+    Column("item_id", Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True),
+    Column("matched_item_id", Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True),
+    Column("score", Float, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    CheckConstraint("item_id < matched_item_id", name="item_matches_ordered"),
+)
+
+# Items the matcher has already scored against their candidate window
+item_match_scans = Table(
+    "item_match_scans",
+    Base.metadata,
+    Column("item_id", Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True),
+    Column("scanned_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
@@ -0,0 +1,17 @@
+from sqlalchemy import Index
+from app.models.user import User
+from app.models.item import Item
+from app.models.event import Event
+from app.models.notification import Notification
+from app.models.feedback import Feedback
+
+# Composite indexes matching the keyset sort order of each paginated list
+# (see app.core.pagination). Declared here so create_all builds them too.
+pagination_indexes = [
+    Index("idx_events_start_time_id", Event.start_time, Event.id),
+    Index("idx_items_created_at_id", Item.created_at, Item.id),
+    Index("idx_items_status_created_at_id", Item.status, Item.created_at, Item.id),
+    Index("idx_notifications_user_created_at_id", Notification.user_id, Notification.created_at, Notification.id),
+    Index("idx_users_created_at_id", User.created_at, User.id),
+    Index("idx_feedback_created_at_id", Feedback.created_at, Feedback.id),
+]
@@ -0,0 +1,12 @@
+from sqlalchemy import Table, Column, Integer, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.session import Base
+
+# Per-user counter embedded in access tokens as the "ver" claim; bumping it
+# revokes every token issued with the old role/verified claims.
+token_versions = Table(
+    "token_versions",
+    Base.metadata,
+    Column("user_id", UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("version", Integer, nullable=False, default=0),
+)
@@ -0,0 +1,16 @@
+from functools import lru_cache
+from app.core.config import settings
+from app.storage.base import StorageBackend
+
+
+@lru_cache(maxsize=1)
+def get_storage() -> StorageBackend:
+    """The STORAGE_BACKEND selected in Settings, created once per process"""
+    if settings.STORAGE_BACKEND == "local":
+        from app.storage.local import LocalStorage
+        return LocalStorage(
+            settings.LOCAL_STORAGE_ROOT,
+            settings.LOCAL_STORAGE_PUBLIC_URL or f"{settings.API_V1_STR}/storage"
+        )
+    from app.storage.supabase import SupabaseStorage
+    return SupabaseStorage(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
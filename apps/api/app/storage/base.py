@@ -0,0 +1,65 @@
+import time
+from pathlib import Path
+from typing import Optional
+from fastapi import HTTPException
+from app.core.metrics import STORAGE_REQUEST_DURATION
+
+
+class StorageError(HTTPException):
+    """A failed storage call; `status` is the label recorded in metrics"""
+
+    def __init__(self, status_code: int, detail: str, status: str = "error"):
+        super().__init__(status_code=status_code, detail=detail)
+        self.status = status
+
+
+class StorageBackend:
+    """
+    Object storage used for uploads. Objects are addressed by bucket and path
+    and served from public_url(); select the implementation with STORAGE_BACKEND.
+    """
+
+    name = "base"
+    # Seconds a URL from create_upload_url stays valid
+    upload_url_lifetime = 0
+
+    async def put(self, bucket: str, path: str, content: bytes, content_type: str) -> None:
+        start = time.perf_counter()
+        status = "error"
+        try:
+            status = await self._put(bucket, path, content, content_type)
+        except StorageError as e:
+            status = e.status
+            raise
+        finally:
+            STORAGE_REQUEST_DURATION.observe(time.perf_counter() - start, operation="upload", status=status)
+
+    async def _put(self, bucket: str, path: str, content: bytes, content_type: str) -> str:
+        """Store the object; returns a status label for metrics, or raises StorageError with one"""
+        raise NotImplementedError
+
+    def public_url(self, bucket: str, path: str) -> str:
+        raise NotImplementedError
+
+    def local_path(self, bucket: str, path: str) -> Optional[Path]:
+        """The object's file when it's on this host's disk, so workers can skip HTTP"""
+        return None
+
+    async def create_upload_url(self, bucket: str, path: str, content_type: str, max_bytes: int) -> dict:
+        """
+        {"url", "method", "headers"} letting a client upload one object directly.
+        The backend may not enforce max_bytes; check size() once the client is done.
+        """
+        raise NotImplementedError
+
+    async def size(self, bucket: str, path: str) -> Optional[int]:
+        """Object size in bytes, or None if it doesn't exist"""
+        raise NotImplementedError
+
+    async def get(self, bucket: str, path: str, max_bytes: Optional[int] = None) -> bytes:
+        """The object's content; StorageError 413 if it's larger than max_bytes"""
+        raise NotImplementedError
+
+    async def delete(self, bucket: str, path: str) -> None:
+        """Removes the object; a missing object is not an error"""
+        raise NotImplementedError
@@ -0,0 +1,67 @@
+"""
+Storing processed uploads: variants go to UPLOAD_BUCKET as <id>/<variant>.<ext>
+and the perceptual hash is recorded for near-duplicate lookups. Shared by the
+proxied upload endpoint and the direct-upload worker.
+"""
+import asyncio
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.images import extension, variant_url, hash_bands, hamming, to_signed64, VARIANT_SIZES
+from app.models.image_hash import image_hashes
+from app.storage.backend import get_storage
+
+# Public-read bucket holding the processed variants
+UPLOAD_BUCKET = "lost_items"
+
+
+async def find_duplicate(db: AsyncSession, uploader_id, phash: int) -> Optional[str]:
+    """URL of this user's closest earlier upload within IMAGE_DEDUP_MAX_DISTANCE bits, if any"""
+    bands = hash_bands(phash)
+    rows = (await db.execute(
+        select(image_hashes.c.phash, image_hashes.c.url).where(
+            image_hashes.c.uploader_id == uploader_id,
+            or_(*[image_hashes.c[f"band{i}"] == band for i, band in enumerate(bands)])
+        )
+    )).all()
+    distances = [(hamming(row.phash, phash), row.url) for row in rows]
+    distances = [d for d in distances if d[0] <= settings.IMAGE_DEDUP_MAX_DISTANCE]
+    return min(distances)[1] if distances else None
+
+def original_path(upload_id) -> str:
+    """Where a direct upload's original lives in UPLOAD_ORIGINALS_BUCKET"""
+    return f"{upload_id}/original"
+
+def upload_id_from_path(path: str) -> Optional[UUID]:
+    """Inverse of original_path(); None for any other path"""
+    upload_id, _, name = path.partition("/")
+    try:
+        return UUID(upload_id) if name == "original" else None
+    except ValueError:
+        return None
+
+def variant_urls(url: str) -> dict:
+    return {name: variant_url(url, name) for name in VARIANT_SIZES}
+
+async def store_variants(image_id, variants: Dict[str, Tuple[bytes, str]]) -> Dict[str, str]:
+    """Uploads the variants concurrently (they're small); returns their public URLs"""
+    storage = get_storage()
+    ext = extension(settings.IMAGE_FORMAT)
+    paths = {name: f"{image_id}/{name}.{ext}" for name in variants}
+    await asyncio.gather(*(
+        storage.put(UPLOAD_BUCKET, paths[name], content, content_type)
+        for name, (content, content_type) in variants.items()
+    ))
+    return {name: storage.public_url(UPLOAD_BUCKET, path) for name, path in paths.items()}
+
+async def record_hash(db: AsyncSession, uploader_id, phash: int, url: str) -> None:
+    """Adds the upload to image_hashes; the caller commits"""
+    bands = hash_bands(phash)
+    await db.execute(image_hashes.insert().values(
+        uploader_id=uploader_id,
+        phash=to_signed64(phash),
+        url=url,
+        **{f"band{i}": band for i, band in enumerate(bands)}
+    ))
@@ -0,0 +1,193 @@
+"""
+Local-disk storage, for development, tests and offline benchmarks.
+
+Objects are files under LOCAL_STORAGE_ROOT/<bucket>/<path>, served by the
+/storage route with HTTP Range support. The body goes out through the ASGI
+zero-copy send extension when the server offers it; otherwise it is read in
+chunks off the event loop. Behind nginx, set LOCAL_STORAGE_ACCEL_REDIRECT
+and nginx sends the file itself with sendfile(2).
+"""
+import os
+import re
+import tempfile
+from email.utils import formatdate
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+import anyio
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from app.core.config import settings
+from app.core.security import create_upload_token
+from app.storage.base import StorageBackend, StorageError
+
+CHUNK_SIZE = 64 * 1024
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class LocalStorage(StorageBackend):
+    name = "local"
+
+    def __init__(self, root: str, public_base_url: str):
+        self.root = Path(root).resolve()
+        self.public_base_url = public_base_url.rstrip("/")
+        self.upload_url_lifetime = settings.UPLOAD_URL_EXPIRE_SECONDS
+
+    def resolve(self, bucket: str, path: str) -> Path:
+        """Absolute path of an object; 404 for anything that escapes the root"""
+        full = (self.root / bucket / path).resolve()
+        if self.root not in full.parents:
+            raise HTTPException(status_code=404, detail="Not found")
+        return full
+
+    def _write(self, target: Path, content: bytes) -> None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    async def _put(self, bucket: str, path: str, content: bytes, content_type: str) -> str:
+        await run_in_threadpool(self._write, self.resolve(bucket, path), content)
+        return "local"
+
+    def public_url(self, bucket: str, path: str) -> str:
+        return f"{self.public_base_url}/{bucket}/{path}"
+
+    def local_path(self, bucket: str, path: str) -> Optional[Path]:
+        return self.resolve(bucket, path)
+
+    async def create_upload_url(self, bucket: str, path: str, content_type: str, max_bytes: int) -> dict:
+        token = create_upload_token(bucket, path, content_type, max_bytes)
+        return {"url": f"{self.public_base_url}/upload/{token}", "method": "PUT", "headers": {"Content-Type": content_type}}
+
+    async def write_stream(self, bucket: str, path: str, chunks: AsyncIterator[bytes], max_bytes: int) -> bool:
+        """
+        Stores a streamed body atomically; False (and nothing stored) if it
+        exceeds max_bytes. Never overwrites: FileExistsError if the object exists.
+        """
+        target = self.resolve(bucket, path)
+        await run_in_threadpool(target.parent.mkdir, parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".upload-")
+        os.close(fd)
+        written = 0
+        try:
+            async with await anyio.open_file(tmp, "wb") as f:
+                async for chunk in chunks:
+                    written += len(chunk)
+                    if written > max_bytes:
+                        return False
+                    await f.write(chunk)
+            # link() fails if the target exists, unlike rename()
+            os.link(tmp, target)
+        finally:
+            os.unlink(tmp)
+        return True
+
+    async def size(self, bucket: str, path: str) -> Optional[int]:
+        target = self.resolve(bucket, path)
+        return target.stat().st_size if target.is_file() else None
+
+    async def get(self, bucket: str, path: str, max_bytes: Optional[int] = None) -> bytes:
+        target = self.resolve(bucket, path)
+        if max_bytes is not None and target.stat().st_size > max_bytes:
+            raise StorageError(413, f"Object exceeds {max_bytes} bytes", status="413")
+        return await run_in_threadpool(target.read_bytes)
+
+    async def delete(self, bucket: str, path: str) -> None:
+        self.resolve(bucket, path).unlink(missing_ok=True)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) for a single `bytes=` range, None to send the whole
+    file (no header, or multiple ranges). Raises ValueError if unsatisfiable.
+    """
+    if not header or "," in header:
+        return None
+    match = _RANGE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        start, end = max(size - int(last), 0), size - 1  # suffix: the last N bytes
+    else:
+        return None
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+class RangeFileResponse(Response):
+    """Serves a file (or one byte range of it) with ETag/Last-Modified validators"""
+
+    def __init__(self, path: Path, media_type: str, range_header: Optional[str] = None,
+                 if_none_match: Optional[str] = None, method: str = "GET"):
+        stat = path.stat()
+        self.path = path
+        self.method = method
+        self.size = stat.st_size
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        self.media_type = media_type
+        self.background = None
+        self.start, self.end = 0, self.size - 1
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": self.etag,
+            "last-modified": formatdate(stat.st_mtime, usegmt=True),
+            "cache-control": "public, max-age=31536000, immutable",
+        }
+
+        if if_none_match and self.etag in [t.strip() for t in if_none_match.split(",")]:
+            self.status_code = 304
+            self.send_body = False
+        else:
+            try:
+                byte_range = parse_range(range_header, self.size)
+            except ValueError:
+                byte_range = None
+                self.status_code = 416
+                self.send_body = False
+                headers["content-range"] = f"bytes */{self.size}"
+            else:
+                self.status_code = 200
+                self.send_body = method != "HEAD" and self.size > 0
+                if byte_range is not None:
+                    self.start, self.end = byte_range
+                    self.status_code = 206
+                    headers["content-range"] = f"bytes {self.start}-{self.end}/{self.size}"
+                headers["content-length"] = str(self.end - self.start + 1)
+        self.init_headers(headers)  # adds content-type from media_type
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        count = self.end - self.start + 1
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f.fileno(), "offset": self.start, "count": count})
+            return
+
+        async with await anyio.open_file(self.path, "rb") as f:
+            await f.seek(self.start)
+            remaining = count
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:  # file shrank underneath us; end the response
+            await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,78 @@
+from typing import Optional
+import httpx
+from app.core.http_client import get_storage_client
+from app.storage.base import StorageBackend, StorageError
+
+
+class SupabaseStorage(StorageBackend):
+    """Supabase Storage REST API with the service role key; buckets must allow public read"""
+
+    name = "supabase"
+    upload_url_lifetime = 2 * 60 * 60  # fixed by Supabase
+
+    def __init__(self, url: str, service_key: str):
+        self.url = url.rstrip("/")
+        self.service_key = service_key
+
+    async def _request(self, method: str, endpoint: str, action: str, **kwargs) -> httpx.Response:
+        headers = {"Authorization": f"Bearer {self.service_key}", **kwargs.pop("headers", {})}
+        try:
+            return await get_storage_client().request(method, f"{self.url}/storage/v1/{endpoint}", headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            raise StorageError(502, f"{action} failed: {type(e).__name__}")
+
+    def _check(self, resp: httpx.Response, action: str) -> None:
+        if resp.status_code not in (200, 201):
+            raise StorageError(500, f"{action} failed: {resp.status_code} {resp.text}", status=str(resp.status_code))
+
+    async def _put(self, bucket: str, path: str, content: bytes, content_type: str) -> str:
+        resp = await self._request(
+            "POST", f"object/{bucket}/{path}", "Upload",
+            headers={"Content-Type": content_type, "x-upsert": "true"}, content=content
+        )
+        self._check(resp, "Upload")
+        return str(resp.status_code)
+
+    async def create_upload_url(self, bucket: str, path: str, content_type: str, max_bytes: int) -> dict:
+        # Size is capped by the bucket's file_size_limit, not per URL. Without
+        # x-upsert the URL can create the object once; a second PUT is rejected.
+        resp = await self._request("POST", f"object/upload/sign/{bucket}/{path}", "Signing upload")
+        self._check(resp, "Signing upload")
+        return {
+            "url": f"{self.url}/storage/v1{resp.json()['url']}",
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+        }
+
+    async def size(self, bucket: str, path: str) -> Optional[int]:
+        resp = await self._request("HEAD", f"object/authenticated/{bucket}/{path}", "Lookup")
+        # Storage answers 400 rather than 404 for some missing objects
+        if resp.status_code in (400, 404):
+            return None
+        self._check(resp, "Lookup")
+        return int(resp.headers.get("content-length", 0))
+
+    async def get(self, bucket: str, path: str, max_bytes: Optional[int] = None) -> bytes:
+        url = f"{self.url}/storage/v1/object/authenticated/{bucket}/{path}"
+        headers = {"Authorization": f"Bearer {self.service_key}"}
+        content = bytearray()
+        try:
+            async with get_storage_client().stream("GET", url, headers=headers) as resp:
+                if resp.status_code != 200:
+                    await resp.aread()
+                    self._check(resp, "Download")
+                async for chunk in resp.aiter_bytes():
+                    content += chunk
+                    if max_bytes is not None and len(content) > max_bytes:
+                        raise StorageError(413, f"Object exceeds {max_bytes} bytes", status="413")
+        except httpx.HTTPError as e:
+            raise StorageError(502, f"Download failed: {type(e).__name__}")
+        return bytes(content)
+
+    async def delete(self, bucket: str, path: str) -> None:
+        resp = await self._request("DELETE", f"object/{bucket}/{path}", "Delete")
+        if resp.status_code not in (400, 404):
+            self._check(resp, "Delete")
+
+    def public_url(self, bucket: str, path: str) -> str:
+        return f"{self.url}/storage/v1/object/public/{bucket}/{path}"
@@ -0,0 +1,61 @@
+"""
+Load a running API with concurrent requests and report throughput and latency.
+Run it against a single uvicorn worker before and after a change to compare.
+
+Usage:
+    python -m benchmarks.bench_concurrency --base-url http://localhost:8000 \\
+        --token <jwt> --path /api/v1/users/me --path /api/v1/events --concurrency 1 16 64
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+async def worker(client: httpx.AsyncClient, paths: list, deadline: float, latencies: list, errors: list):
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            resp = await client.get(path)
+            if resp.status_code >= 400:
+                errors.append(resp.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+
+async def run(base_url: str, token: str, paths: list, concurrency: int, duration: float) -> dict:
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(worker(client, paths, deadline, latencies, errors) for _ in range(concurrency)))
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0,
+        "errors": len(errors),
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", default="")
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    paths = args.paths or ["/api/v1/users/me"]
+
+    print(f"{'concurrency':>11} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for concurrency in args.concurrency:
+        r = asyncio.run(run(args.base_url, args.token, paths, concurrency, args.duration))
+        print(f"{concurrency:>11} {r['rps']:>9.1f} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['errors']:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compare the old list_items search (ILIKE on title and description, a full
+scan) with the trigram search served by idx_items_search, on a large items
+table, for common words, rare substrings and typos, with and without filters.
+
+Seeds --items items inside a transaction that is rolled back at the end.
+Run `python init_db.py` first so the search function and index exist.
+
+Usage: python -m benchmarks.bench_item_search [--items 500000] [--runs 20]
+"""
+import argparse
+import hashlib
+import statistics
+import time
+from datetime import datetime
+from sqlalchemy import select, text
+from app.core.config import settings
+from app.core.pagination import paginate
+from app.db.search import item_search, SET_WORD_SIMILARITY_SQL
+from app.db.session import engine
+from app.models.item import Item
+
+PAGE_SIZE = 50
+
+SEED_SQL = text("""
+    INSERT INTO items (title, description, category, location, status, created_at)
+    SELECT
+        (ARRAY['black', 'blue', 'red', 'grey', 'white', 'green', 'brown', 'silver'])[1 + g % 8] || ' ' ||
+        (ARRAY['wallet', 'umbrella', 'laptop', 'charger', 'backpack', 'calculator', 'headphones',
+               'notebook', 'water bottle', 'jacket', 'keys', 'id card'])[1 + (g / 8) % 12],
+        'Left behind after class, tag ' || md5(g::text),
+        (ARRAY['electronics', 'books', 'clothing', 'accessories', 'keys', 'other'])[1 + (g / 3) % 6],
+        (ARRAY['library', 'cafeteria', 'gym', 'hostel block a', 'auditorium', 'parking lot'])[1 + (g / 5) % 6],
+        (ARRAY['active', 'claimed', 'resolved'])[1 + (g / 7) % 3],
+        now() - (g || ' minutes')::interval
+    FROM generate_series(1, :n) g
+""")
+
+def old_query(q: str, status=None, category=None):
+    query = select(Item.id)
+    if status:
+        query = query.where(Item.status == status)
+    if category:
+        query = query.where(Item.category == category)
+    query = query.where(Item.title.ilike(f"%{q}%") | Item.description.ilike(f"%{q}%"))
+    return query.order_by(Item.created_at.desc(), Item.id.desc()).limit(PAGE_SIZE + 1)
+
+def new_query(q: str, status=None, category=None):
+    query = select(Item.id)
+    if status:
+        query = query.where(Item.status == status)
+    if category:
+        query = query.where(Item.category == category)
+    search_filter, rank = item_search(q, "postgresql", [Item.title, Item.description, Item.category, Item.location])
+    query = query.where(search_filter).order_by(rank.desc())
+    return paginate(query, [Item.created_at, Item.id], (datetime, int), PAGE_SIZE, descending=True)
+
+def timed(conn, query, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        conn.execute(query).all()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def uses_index(conn, query) -> bool:
+    compiled = query.compile(dialect=conn.dialect)
+    plan = "\n".join(conn.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).scalars())
+    return "idx_items_search" in plan
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=500_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    rare = hashlib.md5(str(args.items // 2).encode()).hexdigest()[:10]
+    cases = [
+        ("common word", "wallet", {}),
+        ("common word + filters", "wallet", {"status": "active", "category": "accessories"}),
+        ("rare substring", rare, {}),
+        ("typo", "umbrela", {}),
+        ("typo + status", "calculater", {"status": "active"}),
+    ]
+
+    with engine.connect() as conn:
+        tx = conn.begin()
+        try:
+            start = time.perf_counter()
+            conn.execute(SEED_SQL, {"n": args.items})
+            conn.execute(text("ANALYZE items"))
+            print(f"seeded {args.items} items in {time.perf_counter() - start:.1f} s; median of {args.runs} runs")
+            conn.execute(SET_WORD_SIMILARITY_SQL, {"threshold": str(settings.ITEM_SEARCH_SIMILARITY_THRESHOLD)})
+
+            for label, q, filters in cases:
+                old, new = old_query(q, **filters), new_query(q, **filters)
+                old_hits = len(conn.execute(old).all())
+                new_hits = len(conn.execute(new).all())
+                print(f"  {label:24} q={q!r}")
+                print(f"    ilike:   {timed(conn, old, args.runs):9.2f} ms  {old_hits:3} rows")
+                print(f"    trigram: {timed(conn, new, args.runs):9.2f} ms  {new_hits:3} rows"
+                      f"  {'(idx_items_search)' if uses_index(conn, new) else '(no index)'}")
+        finally:
+            tx.rollback()
+
+if __name__ == "__main__":
+    main()
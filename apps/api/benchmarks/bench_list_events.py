@@ -0,0 +1,67 @@
+"""
+Compare the old list_events RSVP lookup (every RSVP the user ever made) with
+the single page query for a user with thousands of historical RSVPs.
+
+Seeds events and RSVPs inside a transaction that is rolled back at the end,
+so it is safe to point at a development database.
+
+Usage: python -m benchmarks.bench_list_events [--rsvps 5000] [--runs 50]
+"""
+import argparse
+import statistics
+import time
+import uuid
+from sqlalchemy import select, text
+from app.db.session import engine
+from app.models.event import Event, rsvps
+from app.models.user import Profile
+from app.api.v1.endpoints.events import event_page_query
+
+def timed(conn, fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(conn)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def old_list(conn, user_id, page_size=50):
+    events = conn.execute(select(Event).order_by(Event.start_time.asc()).limit(page_size)).all()
+    organizer_ids = [e.organizer_id for e in events if e.organizer_id]
+    conn.execute(select(Profile).where(Profile.user_id.in_(organizer_ids))).all()
+    conn.execute(select(rsvps).where(rsvps.c.user_id == user_id)).all()
+    for e in events:
+        conn.execute(select(rsvps.c.user_id).where(rsvps.c.event_id == e.id)).all()  # len(e.attendees)
+
+def new_list(conn, user_id, page_size=50):
+    conn.execute(event_page_query(user_id).order_by(Event.start_time.asc()).limit(page_size)).all()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rsvps", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    user_id = uuid.uuid4()
+    with engine.connect() as conn:
+        tx = conn.begin()
+        try:
+            conn.execute(text(
+                "INSERT INTO users (id, email, password_hash, role) VALUES (:id, :email, 'x', 'student')"
+            ), {"id": user_id, "email": f"bench-{user_id}@example.com"})
+            event_ids = conn.execute(text("""
+                INSERT INTO events (title, start_time)
+                SELECT 'Bench event ' || g, now() - (g || ' hours')::interval
+                FROM generate_series(1, :n) g
+                RETURNING id
+            """), {"n": args.rsvps}).scalars().all()
+            conn.execute(rsvps.insert(), [{"user_id": user_id, "event_id": eid} for eid in event_ids])
+
+            print(f"user with {args.rsvps} historical RSVPs, page of 50, median of {args.runs} runs")
+            print(f"  old (all RSVPs + per-event attendees): {timed(conn, lambda c: old_list(c, user_id), args.runs):8.2f} ms")
+            print(f"  new (single page query):               {timed(conn, lambda c: new_list(c, user_id), args.runs):8.2f} ms")
+        finally:
+            tx.rollback()
+
+if __name__ == "__main__":
+    main()
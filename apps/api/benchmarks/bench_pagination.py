@@ -0,0 +1,73 @@
+"""
+Compare page-N latency of offset and keyset (cursor) pagination on the
+notifications list, the same query get_notifications runs.
+
+Seeds --pages * --page-size notifications for a throwaway user inside a
+transaction that is rolled back at the end.
+
+Usage: python -m benchmarks.bench_pagination [--pages 1000] [--page-size 50] [--runs 20]
+"""
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime
+from sqlalchemy import select, text
+from app.db.session import engine
+from app.models.notification import Notification
+from app.core.pagination import paginate, encode_cursor
+
+def timed(conn, query, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        conn.execute(query).all()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    user_id = uuid.uuid4()
+    rows = args.pages * args.page_size
+    columns = [Notification.created_at, Notification.id]
+    base = select(Notification).where(Notification.user_id == user_id)
+
+    with engine.connect() as conn:
+        tx = conn.begin()
+        try:
+            conn.execute(text(
+                "INSERT INTO users (id, email, password_hash, role) VALUES (:id, :email, 'x', 'student')"
+            ), {"id": user_id, "email": f"bench-{user_id}@example.com"})
+            conn.execute(text("""
+                INSERT INTO notifications (user_id, type, title, message, read, created_at)
+                SELECT :user_id, 'bench', 'Bench ' || g, 'message', false, now() - (g || ' seconds')::interval
+                FROM generate_series(1, :n) g
+            """), {"user_id": user_id, "n": rows})
+            conn.execute(text("ANALYZE notifications"))
+
+            offset = (args.pages - 1) * args.page_size
+            # Cursor for the last row of the page before the one being measured
+            last = conn.execute(
+                base.with_only_columns(*columns)
+                .order_by(Notification.created_at.desc(), Notification.id.desc())
+                .offset(offset - 1).limit(1)
+            ).one()
+            cursor = encode_cursor((last.created_at, last.id))
+
+            by_offset = paginate(base, columns, (datetime, int), args.page_size, offset=offset, descending=True)
+            by_cursor = paginate(base, columns, (datetime, int), args.page_size, cursor=cursor, descending=True)
+            assert [r.id for r in conn.execute(by_offset)] == [r.id for r in conn.execute(by_cursor)]
+
+            print(f"{rows} notifications, page {args.pages} of {args.page_size}, median of {args.runs} runs")
+            print(f"  offset: {timed(conn, by_offset, args.runs):8.2f} ms")
+            print(f"  cursor: {timed(conn, by_cursor, args.runs):8.2f} ms")
+        finally:
+            tx.rollback()
+
+if __name__ == "__main__":
+    main()
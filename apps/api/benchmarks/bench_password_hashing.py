@@ -0,0 +1,42 @@
+"""
+Benchmark login throughput (password verifications per second) against the
+number of hashing processes.
+
+Usage: python -m benchmarks.bench_password_hashing [--logins 400]
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from app.core import hashing
+
+def run(executor, logins: int, password_hash: str) -> float:
+    start = time.perf_counter()
+    futures = [executor.submit(hashing.verify_password, "correct horse", password_hash) for _ in range(logins)]
+    for f in futures:
+        f.result()
+    return logins / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=400)
+    args = parser.parse_args()
+
+    password_hash = hashing.hash_password("correct horse")
+    cores = multiprocessing.cpu_count()
+
+    # Baseline: hashing on the default 40-thread pool, as sync endpoints did
+    with ThreadPoolExecutor(max_workers=40) as executor:
+        print(f"threadpool (40 threads): {run(executor, args.logins, password_hash):8.1f} logins/s")
+
+    workers = 1
+    while True:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            executor.submit(hashing.verify_password, "warmup", password_hash).result()
+            print(f"process pool ({workers:2d} of {cores} cores): {run(executor, args.logins, password_hash):8.1f} logins/s")
+        if workers >= cores:
+            break
+        workers = min(workers * 2, cores)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Hammer a single capped event with concurrent RSVPs through a running API and
+check that it never overbooks.
+
+Signs up --users throwaway students, creates an event with --capacity seats
+using an organizer (faculty/admin) token, then fires every RSVP at once.
+
+Usage:
+    python -m benchmarks.bench_rsvp_contention --organizer-token <jwt> --users 300 --capacity 50
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+import httpx
+
+async def signup(client: httpx.AsyncClient, run_id: str, i: int) -> str:
+    resp = await client.post("/api/v1/auth/signup", json={
+        "email": f"rsvp-bench-{run_id}-{i}@example.com",
+        "password": "bench-password",
+        "name": f"RSVP Bench {i}",
+        "roll_no": f"BENCH-{run_id}-{i}",
+    })
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+async def rsvp(client: httpx.AsyncClient, event_id: int, token: str):
+    start = time.perf_counter()
+    resp = await client.post(f"/api/v1/events/{event_id}/rsvp", headers={"Authorization": f"Bearer {token}"})
+    return time.perf_counter() - start, resp.status_code, resp.json() if resp.status_code < 500 else {}
+
+async def main(args):
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        tokens = []
+        for batch in range(0, args.users, 20):
+            tokens += await asyncio.gather(*(signup(client, run_id, i) for i in range(batch, min(batch + 20, args.users))))
+
+        resp = await client.post("/api/v1/events", headers={"Authorization": f"Bearer {args.organizer_token}"}, json={
+            "title": f"RSVP contention bench {run_id}",
+            "start_time": (datetime.utcnow() + timedelta(days=7)).isoformat(),
+            "max_attendees": args.capacity,
+        })
+        resp.raise_for_status()
+        event_id = resp.json()["id"]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(rsvp(client, event_id, t) for t in tokens))
+        elapsed = time.perf_counter() - start
+
+        event = (await client.get(f"/api/v1/events/{event_id}", headers={"Authorization": f"Bearer {tokens[0]}"})).json()
+
+    latencies = sorted(r[0] for r in results)
+    seated = sum(1 for r in results if r[1] == 200 and not r[2].get("waitlisted"))
+    waitlisted = sum(1 for r in results if r[1] == 200 and r[2].get("waitlisted"))
+    failed = sum(1 for r in results if r[1] != 200)
+    print(f"{args.users} concurrent RSVPs in {elapsed:.2f}s ({args.users / elapsed:.1f}/s)")
+    print(f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+    print(f"seated={seated} waitlisted={waitlisted} failed={failed} stored attendee_count={event['attendee_count']}")
+    ok = seated == event["attendee_count"] <= args.capacity
+    print("OK: capacity held" if ok else "FAIL: overbooked or count mismatch")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--organizer-token", required=True)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--capacity", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
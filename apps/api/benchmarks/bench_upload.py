@@ -0,0 +1,94 @@
+"""
+Upload throughput and server memory per in-flight upload for /upload/image.
+
+Fires --concurrency simultaneous uploads of a --size-mb random payload for
+--duration seconds against a running API and reports uploads per second and
+latency. With --api-pid, samples the server's resident memory (Linux
+/proc/<pid>/status) and reports the peak increase per in-flight upload,
+which is roughly the file size when bodies are buffered and the chunk size
+when they are streamed.
+
+Usage:
+    python -m benchmarks.bench_upload --base-url http://localhost:8000 --token <jwt> \\
+        --size-mb 5 --concurrency 1 8 32 --api-pid $(pgrep -f "uvicorn app.main")
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+import httpx
+
+def rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+class RssSampler(threading.Thread):
+    def __init__(self, pid: int, interval: float = 0.02):
+        super().__init__(daemon=True)
+        self.pid, self.interval = pid, interval
+        self.baseline = rss_bytes(pid)
+        self.peak = self.baseline
+        self._stop = threading.Event()
+
+    def run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_bytes(self.pid))
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop.set()
+        self.join()
+
+async def worker(client, payload: bytes, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            resp = await client.post("/api/v1/upload/image", files={"file": ("bench.jpg", payload, "image/jpeg")})
+            if resp.status_code >= 400:
+                errors.append(resp.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+
+async def run(args, concurrency: int, payload: bytes) -> None:
+    sampler = RssSampler(args.api_pid) if args.api_pid else None
+    if sampler:
+        sampler.start()
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {args.token}"}
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=120) as client:
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*(worker(client, payload, deadline, latencies, errors) for _ in range(concurrency)))
+    line = (
+        f"concurrency={concurrency:<4} uploads/s={len(latencies) / args.duration:7.2f} "
+        f"p50={statistics.median(latencies) * 1000:8.1f} ms  errors={len(errors)}"
+    )
+    if sampler:
+        sampler.stop()
+        per_upload = (sampler.peak - sampler.baseline) / concurrency
+        line += f"  peak rss +{(sampler.peak - sampler.baseline) / 2**20:.1f} MiB ({per_upload / 2**20:.2f} MiB/upload)"
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--size-mb", type=float, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--api-pid", type=int)
+    args = parser.parse_args()
+
+    payload = os.urandom(int(args.size_mb * 2**20))
+    print(f"{args.size_mb} MiB uploads for {args.duration}s per level")
+    for concurrency in args.concurrency:
+        asyncio.run(run(args, concurrency, payload))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Recall and latency of top-k item similarity search on a synthetic corpus.
+
+Generates --items clustered, normalized 512-d vectors (clusters stand in for
+"similar photos"), computes exact top-k with NumPy as ground truth, then
+measures:
+  - the NumPy brute-force fallback (app.ml.similarity.NumpyIndex)
+  - pgvector ivfflat (lists=100, as in schema.sql) at several probes values,
+    on a temporary table, unless --numpy-only
+
+Usage: python -m benchmarks.bench_vector_search [--items 100000] [--queries 200] [--k 10] [--numpy-only]
+"""
+import argparse
+import statistics
+import time
+import numpy as np
+from app.ml.embeddings import EMBEDDING_DIM, to_pgvector
+from app.ml.similarity import NumpyIndex
+
+def synthetic_corpus(n: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, EMBEDDING_DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, EMBEDDING_DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def recall(found, truth) -> float:
+    return len(set(found) & set(truth)) / len(truth)
+
+def report(name: str, latencies: list, recalls: list) -> None:
+    p50 = statistics.median(latencies) * 1000
+    p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000
+    print(f"  {name:<22} recall@k={statistics.mean(recalls):.3f}  p50={p50:7.2f} ms  p95={p95:7.2f} ms")
+
+def bench_numpy(ids, vectors, queries, truth, k):
+    index = NumpyIndex(ttl=0)
+    index.build(ids, vectors)
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = [item_id for item_id, _ in index.search(query, k)]
+        latencies.append(time.perf_counter() - start)
+        recalls.append(recall(found, expected))
+    report("numpy brute force", latencies, recalls)
+
+def bench_pgvector(ids, vectors, queries, truth, k, probes_values):
+    from sqlalchemy import text
+    from app.db.session import engine
+
+    with engine.connect() as conn:
+        conn.execute(text(f"CREATE TEMP TABLE bench_items (id INT PRIMARY KEY, embedding vector({EMBEDDING_DIM}))"))
+        cursor = conn.connection.dbapi_connection.cursor()
+        start = time.perf_counter()
+        with cursor.copy("COPY bench_items (id, embedding) FROM STDIN") as copy:
+            for item_id, vector in zip(ids, vectors):
+                copy.write_row((int(item_id), to_pgvector(vector)))
+        conn.execute(text("CREATE INDEX ON bench_items USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)"))
+        conn.execute(text("ANALYZE bench_items"))
+        print(f"  loaded and indexed in {time.perf_counter() - start:.1f} s")
+
+        search = text("""
+            SELECT id FROM bench_items
+            ORDER BY embedding <=> CAST(:query AS vector)
+            LIMIT :k
+        """)
+        for probes in probes_values:
+            conn.execute(text("SELECT set_config('ivfflat.probes', :probes, false)"), {"probes": str(probes)})
+            latencies, recalls = [], []
+            for query, expected in zip(queries, truth):
+                literal = to_pgvector(query)
+                start = time.perf_counter()
+                found = conn.execute(search, {"query": literal, "k": k}).scalars().all()
+                latencies.append(time.perf_counter() - start)
+                recalls.append(recall(found, expected))
+            report(f"ivfflat probes={probes}", latencies, recalls)
+        conn.rollback()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 5, 10, 20, 50])
+    parser.add_argument("--numpy-only", action="store_true")
+    args = parser.parse_args()
+
+    vectors = synthetic_corpus(args.items + args.queries, args.clusters)
+    corpus, queries = vectors[:args.items], vectors[args.items:]
+    ids = np.arange(1, args.items + 1)
+
+    # Exact top-k for every query
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, args.k - 1, axis=1)[:, :args.k]
+    truth = [ids[row].tolist() for row in top]
+
+    print(f"{args.items} items x {EMBEDDING_DIM} dims, {args.queries} queries, k={args.k}")
+    bench_numpy(ids, corpus, queries, truth, args.k)
+    if not args.numpy_only:
+        bench_pgvector(ids, corpus, queries, truth, args.k, args.probes)
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,35 @@
 """Initialize database tables"""
 from app.db.session import engine, Base
 from app.models.user import User, Profile
+from app.models.token_version import token_versions
+from app.models.calendar_token_version import calendar_token_versions
 from app.models.item import Item, ItemClaim
+from app.models.item_embedding import item_embedding_failures, item_embedding_leases
+from app.models.item_match import item_matches, item_match_scans
+from app.models.image_hash import image_hashes
+from app.models.direct_upload import direct_uploads
 from app.models.department import Department
 from app.models.event import Event
+from app.models.event_attendance import event_stats, event_waitlist
+from app.models.event_reminder import event_reminders
 from app.models.schedule import Schedule
 from app.models.feedback import Feedback, FeedbackToken
 from app.models.notification import Notification
+from app.models.pagination_indexes import pagination_indexes
+from app.jobs.attendance import SEED_SQL as SEED_ATTENDANCE_SQL
+from app.db.search import EVENT_SEARCH_DDL, ITEM_SEARCH_DDL, supports_fts
 
 def init_db():
     """Create all tables"""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    if supports_fts(engine.dialect.name):
+        with engine.begin() as conn:
+            for statement in EVENT_SEARCH_DDL + ITEM_SEARCH_DDL:
+                conn.execute(statement)
+    # Backfill attendee counts for events created before event_stats existed
+    with engine.begin() as conn:
+        conn.execute(SEED_ATTENDANCE_SQL)
     print("✓ Database tables created successfully!")
 
 if __name__ == "__main__":
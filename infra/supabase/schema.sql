@@ -1,5 +1,7 @@
 -- Enable pgvector extension for embeddings
 CREATE EXTENSION IF NOT EXISTS vector;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
 
 -- Departments table
 CREATE TABLE departments (
@@ -30,6 +32,18 @@ CREATE TABLE users (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Token versions (bumped on role/verified changes to revoke issued JWT claims)
+CREATE TABLE token_versions (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version INT NOT NULL DEFAULT 0
+);
+
+-- Calendar feed token versions (bumped when a user rotates their feed URL)
+CREATE TABLE calendar_token_versions (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version INT NOT NULL DEFAULT 0
+);
+
 -- Profiles table (extended user info)
 CREATE TABLE profiles (
     user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
@@ -45,6 +59,13 @@ CREATE TABLE profiles (
 );
 
 -- Lost & Found items
+-- Lower-cased searchable text of an item, trigram-indexed below (IMMUTABLE so it can be indexed)
+CREATE OR REPLACE FUNCTION items_search_text(title TEXT, description TEXT, category TEXT, location TEXT)
+RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT lower(coalesce(title, '') || ' ' || coalesce(description, '') || ' '
+        || coalesce(category, '') || ' ' || coalesce(location, ''))
+$$;
+
 CREATE TABLE items (
     id SERIAL PRIMARY KEY,
     title TEXT NOT NULL,
@@ -70,7 +91,76 @@ CREATE TABLE item_claims (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Items the embedding worker couldn't encode (see app/jobs/embeddings.py)
+CREATE TABLE item_embedding_failures (
+    item_id INT PRIMARY KEY REFERENCES items(id) ON DELETE CASCADE,
+    attempts INT NOT NULL DEFAULT 1,
+    last_error TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Items an embedding worker is currently encoding (expired leases are reclaimed)
+CREATE TABLE item_embedding_leases (
+    item_id INT PRIMARY KEY REFERENCES items(id) ON DELETE CASCADE,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- Likely lost/found pairs and items already scanned (see app/jobs/matching.py)
+CREATE TABLE item_matches (
+    item_id INT REFERENCES items(id) ON DELETE CASCADE,
+    matched_item_id INT REFERENCES items(id) ON DELETE CASCADE,
+    score REAL NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (item_id, matched_item_id),
+    CONSTRAINT item_matches_ordered CHECK (item_id < matched_item_id)
+);
+
+CREATE TABLE item_match_scans (
+    item_id INT PRIMARY KEY REFERENCES items(id) ON DELETE CASCADE,
+    scanned_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Perceptual hashes of uploaded images, banded for Hamming-distance lookup (see upload.py)
+CREATE TABLE image_hashes (
+    id SERIAL PRIMARY KEY,
+    uploader_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    phash BIGINT NOT NULL,
+    band0 INT NOT NULL,
+    band1 INT NOT NULL,
+    band2 INT NOT NULL,
+    band3 INT NOT NULL,
+    url TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX idx_image_hashes_band0 ON image_hashes(uploader_id, band0);
+CREATE INDEX idx_image_hashes_band1 ON image_hashes(uploader_id, band1);
+CREATE INDEX idx_image_hashes_band2 ON image_hashes(uploader_id, band2);
+CREATE INDEX idx_image_hashes_band3 ON image_hashes(uploader_id, band3);
+
+-- Client-to-storage uploads awaiting or finished post-processing (see app/jobs/uploads.py)
+CREATE TABLE direct_uploads (
+    id UUID PRIMARY KEY,
+    uploader_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    content_type TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    url TEXT,
+    attempts INT NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX idx_direct_uploads_open ON direct_uploads(status, created_at) WHERE status IN ('pending', 'uploaded');
+
 -- Events
+-- Weighted full-text document for event search (IMMUTABLE so it can back a generated column)
+CREATE OR REPLACE FUNCTION events_search_vector(title TEXT, description TEXT, venue TEXT, tags TEXT[])
+RETURNS tsvector LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(array_to_string(tags, ' '), '')), 'B')
+        || setweight(to_tsvector('english', coalesce(description, '')), 'C')
+        || setweight(to_tsvector('english', coalesce(venue, '')), 'D')
+$$;
+
 CREATE TABLE events (
     id SERIAL PRIMARY KEY,
     title TEXT NOT NULL,
@@ -82,7 +172,8 @@ CREATE TABLE events (
     tags TEXT[],
     max_attendees INT,
     created_at TIMESTAMPTZ DEFAULT NOW(),
-    updated_at TIMESTAMPTZ DEFAULT NOW()
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    search_vector tsvector GENERATED ALWAYS AS (events_search_vector(title, description, venue, tags)) STORED
 );
 
 -- RSVPs
@@ -93,6 +184,33 @@ CREATE TABLE rsvps (
     PRIMARY KEY (user_id, event_id)
 );
 
+-- Denormalized RSVP counts (maintained by the API, see app/jobs/attendance.py)
+CREATE TABLE event_stats (
+    event_id INT PRIMARY KEY REFERENCES events(id) ON DELETE CASCADE,
+    attendee_count INT NOT NULL DEFAULT 0
+);
+-- Backfill counts for events that already have RSVPs
+INSERT INTO event_stats (event_id, attendee_count)
+SELECT e.id, count(r.user_id) FROM events e LEFT JOIN rsvps r ON r.event_id = e.id GROUP BY e.id
+ON CONFLICT (event_id) DO NOTHING;
+
+-- Waitlist for full events (promoted in order on RSVP cancellation)
+CREATE TABLE event_waitlist (
+    event_id INT REFERENCES events(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (event_id, user_id)
+);
+CREATE INDEX idx_event_waitlist_queue ON event_waitlist(event_id, created_at);
+
+-- Reminder windows already sent per event (see app/jobs/reminders.py)
+CREATE TABLE event_reminders (
+    event_id INT REFERENCES events(id) ON DELETE CASCADE,
+    window_minutes INT NOT NULL,
+    sent_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (event_id, window_minutes)
+);
+
 -- Schedules (timetable slots)
 CREATE TABLE schedules (
     id SERIAL PRIMARY KEY,
@@ -127,11 +245,22 @@ CREATE TABLE feedback (
 );
 
 -- Indexes for performance
-CREATE INDEX idx_items_status ON items(status);
+CREATE INDEX idx_items_status_created_at_id ON items(status, created_at, id);
+CREATE INDEX idx_items_created_at_id ON items(created_at, id);
+-- Item search: status/category equality (btree_gin) and trigram match in one index
+CREATE INDEX idx_items_search ON items
+    USING GIN (status, category, items_search_text(title, description, category, location) gin_trgm_ops);
 CREATE INDEX idx_items_embedding ON items USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
-CREATE INDEX idx_events_start_time ON events(start_time);
+-- Work queue for the embedding worker
+CREATE INDEX idx_items_missing_embedding ON items(id) WHERE embedding IS NULL;
+CREATE INDEX idx_events_start_time_id ON events(start_time, id);
+CREATE INDEX idx_events_search ON events USING GIN (search_vector);
+CREATE INDEX idx_events_tags ON events USING GIN (tags);
 CREATE INDEX idx_profiles_roll_no ON profiles(roll_no) WHERE roll_no IS NOT NULL;
 CREATE INDEX idx_users_email ON users(email);
+-- Keyset pagination (ORDER BY created_at DESC, id DESC); notifications is created by init_db
+CREATE INDEX idx_users_created_at_id ON users(created_at, id);
+CREATE INDEX idx_feedback_created_at_id ON feedback(created_at, id);
 
 -- RLS policies (basic setup, to be refined)
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;